@@ -1,7 +1,8 @@
 import os
+import sys
+import logging
 import numpy as np
 import tensorflow as tf
-from scipy import signal
 import shutil
 import glob
 import time
@@ -10,10 +11,22 @@ from dotenv import load_dotenv
 import boto3
 from botocore.exceptions import ClientError
 import tempfile
+from fractions import Fraction
+from numba import njit
 
 # 環境変数を読み込み
 load_dotenv()
 
+# リクエスト処理（前処理・推論・タイムライン生成）のロガー
+# SED_LOG_LEVEL=WARNING にすると通常ログの文字列整形自体が省略される
+logger = logging.getLogger("sed")
+if not logger.handlers:
+    log_handler = logging.StreamHandler(sys.stdout)
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(log_handler)
+logger.setLevel(os.getenv("SED_LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
 # TensorFlowのメモリ使用量を制限
 gpus = tf.config.list_physical_devices('GPU')
 if gpus:
@@ -28,17 +41,24 @@ if gpus:
 tf.config.set_visible_devices([], 'GPU')
 print("TensorFlow: CPUモードで実行します")
 
-import tensorflow_hub as hub
 import csv
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Union, BinaryIO
 import io
-import soundfile as sf
+import re
+import wave
+import queue
+from contextlib import contextmanager, ExitStack
 import aiohttp
 import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
 from datetime import datetime
 
 # Supabaseクライアントの初期化
@@ -84,19 +104,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# timeline-v2の並行処理設定
+V2_DOWNLOAD_CONCURRENCY = 8  # 同時ダウンロード数
+V2_SAVE_CONCURRENCY = 4      # Supabaseへの同時保存数
+V2_DOWNLOAD_LOOKAHEAD_BATCHES = 1  # fetch-and-processで推論中のバッチより先にダウンロードしておくバッチ数
+
+# YamNetのフレーム化パラメータ（16kHz換算のサンプル数）
+YAMNET_PATCH_SAMPLES = 15600  # 1パッチの長さ（0.96秒 + STFT窓）
+YAMNET_HOP_SAMPLES = 7680     # パッチのホップ長（0.48秒）
+YAMNET_BATCH_GAP_HOPS = 2     # バッチ連結時に波形間へ挿入する無音（ホップ数）
+YAMNET_FRAME_SECONDS = YAMNET_HOP_SAMPLES / 16000  # 1フレームの時間（0.48秒、モデル定数）
+YAMNET_FRAME_CENTISECONDS = YAMNET_HOP_SAMPLES // 160  # 1フレームの時間（センチ秒、整数）
+YAMNET_FRAME_BUCKET = 16      # 推論入力長をこのフレーム数単位に切り上げる（XLAの再コンパイル抑制）
+
+# timeline-v2のバッチ推論で1回にまとめるスロット数
+V2_BATCH_SIZE = 8
+
+# アップロード系エンドポイントのマイクロバッチ設定（1回の推論にまとめる最大リクエスト数）
+UPLOAD_BATCH_MAX = 8
+upload_batch_queue = None  # 初回リクエスト時にイベントループ上で作成する
+upload_batch_task = None
+
+# デコード用作業バッファのプール（モノラル化・リサンプリング前の中間配列を使い回す）
+DECODE_BUFFER_POOL_SIZE = 3
+_DECODE_BUFFER_POOL = queue.LifoQueue()
+
+# fetch-and-process-pathsで推論待ちにできるダウンロード済みファイル数
+PATHS_PIPELINE_DEPTH = 4
+
+# summaryエンドポイントで各セグメントに付与する上位イベント数
+SUMMARY_TOP_K = 5
+
+# YamNet推論用の専用スレッド（モデルはスレッドセーフではないため1スレッドで直列化）
+inference_executor = ThreadPoolExecutor(max_workers=1)
+
+# timeline-v2の推論に使うワーカープロセス数（0の場合はinference_executorで直列実行）
+# 各ワーカーがTFランタイムとYamNetを個別に持つため、既定値はメモリを考慮して控えめにする
+V2_INFERENCE_PROCESSES = int(os.getenv("V2_INFERENCE_PROCESSES", str(min(4, (os.cpu_count() or 1) // 2))))
+inference_pool = None  # 初回のtimeline-v2リクエスト時に起動する
+
 # モデルの初期化
 print("YamNetモデルをロード中...")
 model = None  # 初期化時には読み込まず、必要時に遅延ロードする
+model_infer = None  # tf.functionでラップした推論関数（モデルロード時に作成）
+model_load_failed_at = None  # 直近のロード失敗時刻（クールダウン中はリクエストごとの再試行を行わない）
+MODEL_RETRY_COOLDOWN_SECONDS = int(os.getenv("YAMNET_RETRY_COOLDOWN_SECONDS", "60"))
+
+# YamNetをローカルに保存するディレクトリ（2回目以降の起動ではHubを経由せずここから読み込む）
+LOCAL_MODEL_DIR = os.getenv(
+    'YAMNET_LOCAL_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'yamnet_frozen')
+)
 
-# クラスマップの読み込み
-class_map_path = tf.keras.utils.get_file('yamnet_class_map.csv',
-                                         'https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv')
-class_names = []
-with open(class_map_path, 'r') as f:
-    reader = csv.reader(f)
-    next(reader)  # ヘッダーをスキップ
-    for row in reader:
-        class_names.append(row[2])
+# 推論バックエンド（"tf": tf.function/XLA、"tflite": TFLiteに変換して実行）
+YAMNET_BACKEND = os.getenv('YAMNET_BACKEND', 'tf').lower()
+LOCAL_TFLITE_PATH = f"{LOCAL_MODEL_DIR}.tflite"  # 変換済みTFLiteモデルの保存先
+# TFLiteバックエンドでint8量子化モデルを使うか（変換・実行に失敗した場合はFP32モデルを使う）
+YAMNET_TFLITE_INT8 = os.getenv('YAMNET_TFLITE_INT8', 'false').lower() in ('1', 'true', 'yes')
+LOCAL_TFLITE_INT8_PATH = f"{LOCAL_MODEL_DIR}.int8.tflite"  # int8量子化モデルの保存先
+TFLITE_REPRESENTATIVE_SAMPLES = 50  # 量子化のキャリブレーションに使う波形数
+
+# クラスマップ
+# YamNetのSavedModelに同梱されたクラスマップ（assets）をモデルロード時に読み込むため、
+# 別途のダウンロードは不要で、ラベルは常にロードしたモデルと一致する
+# YAMNET_CLASS_MAP_PATHを指定した場合はそのCSVを優先する
+CLASS_MAP_PATH_OVERRIDE = os.getenv('YAMNET_CLASS_MAP_PATH')
+# モデルからクラスマップを取得できない場合のフォールバック（~/.keras/datasetsにキャッシュされる）
+CLASS_MAP_URL = 'https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv'
+
+# ラベルの一括参照用（インデックス配列でまとめて取り出す）。モデルロード時に設定する
+CLASS_NAMES_ARR = None
+
+# 確率・時刻を小数第2位に丸めるための倍率
+PROB_ROUND = 100.0
 
 def clear_tfhub_cache():
     """
@@ -253,6 +333,247 @@ def startup_diagnostics():
     
     return checks
 
+def build_inference_function(loaded_model):
+    """
+    YamNetモデルをtf.functionでラップし、ダミー波形でウォームアップする
+    
+    可変長の1次元float32波形を入力シグネチャに固定してリトレースを防ぎ、
+    XLA（jit_compile=True）でコンパイルする。XLAでコンパイルできない場合は
+    通常のtf.functionにフォールバックする。
+    
+    XLAは入力長ごとにコンパイルし直すため、波形はYAMNET_FRAME_BUCKETフレーム
+    単位の長さまで末尾をゼロ埋めしてから推論し、出力は元の長さ分だけ切り出す。
+    YamNet自身も末尾をゼロ埋めしてフレーム化するため、結果は変わらない。
+    
+    Returns:
+        (scores, embeddings, log_mel_spectrogram) を返す推論関数
+    """
+    input_signature = [tf.TensorSpec(shape=[None], dtype=tf.float32)]
+    dummy_waveform = np.zeros(16000, dtype=np.float32)
+    
+    def bucketed(infer):
+        # 入力バッファは使い回し、より長い入力が来た場合のみ確保し直す
+        input_buffer = np.zeros(0, dtype=np.float32)
+        buffer_lock = threading.Lock()
+        
+        def run(waveform):
+            nonlocal input_buffer
+            waveform = np.asarray(waveform, dtype=np.float32)
+            n_frames = yamnet_frame_count(len(waveform))
+            bucket_frames = -(-n_frames // YAMNET_FRAME_BUCKET) * YAMNET_FRAME_BUCKET
+            padded_len = YAMNET_PATCH_SAMPLES + (bucket_frames - 1) * YAMNET_HOP_SAMPLES
+            with buffer_lock:
+                if len(input_buffer) < padded_len:
+                    input_buffer = np.zeros(padded_len, dtype=np.float32)
+                padded = input_buffer[:padded_len]
+                padded[:len(waveform)] = waveform
+                padded[len(waveform):] = 0.0
+                scores, embeddings, log_mel_spectrogram = infer(padded)
+            # 1パッチ目で96メル、以降は1フレームごとに48メル増える
+            mel_frames = 96 + 48 * (n_frames - 1)
+            return scores[:n_frames], embeddings[:n_frames], log_mel_spectrogram[:mel_frames]
+        return run
+    
+    if YAMNET_BACKEND == 'tflite':
+        if YAMNET_TFLITE_INT8:
+            try:
+                infer = bucketed(build_tflite_inference_function(loaded_model, quantize_int8=True))
+                _ = infer(dummy_waveform)
+                print("⚡ int8量子化したTFLiteの推論関数を使用します")
+                return infer
+            except Exception as e:
+                print(f"⚠️ int8量子化モデルの準備に失敗したためFP32のTFLiteモデルを使用します: {e}")
+        try:
+            infer = bucketed(build_tflite_inference_function(loaded_model))
+            _ = infer(dummy_waveform)
+            print("⚡ TFLiteの推論関数を使用します")
+            return infer
+        except Exception as e:
+            print(f"⚠️ TFLiteでの推論準備に失敗したためTensorFlowで推論します: {e}")
+    
+    try:
+        infer = bucketed(tf.function(loaded_model, input_signature=input_signature, jit_compile=True))
+        _ = infer(dummy_waveform)
+        print("⚡ XLAコンパイル済みの推論関数を使用します")
+        return infer
+    except Exception as e:
+        print(f"⚠️ XLAコンパイルに失敗したため通常の推論関数を使用します: {e}")
+    
+    infer = bucketed(tf.function(loaded_model, input_signature=input_signature))
+    _ = infer(dummy_waveform)
+    return infer
+
+def tflite_representative_dataset():
+    """
+    int8量子化のキャリブレーション用に16kHz・1秒の波形を生成する
+    
+    振幅の異なる正規分布ノイズを[-1, 1]にクリップして、正規化後の音声に近い値域を網羅する。
+    """
+    rng = np.random.default_rng(0)
+    for i in range(TFLITE_REPRESENTATIVE_SAMPLES):
+        amplitude = 10.0 ** (-3.0 + 3.0 * i / (TFLITE_REPRESENTATIVE_SAMPLES - 1))
+        waveform = np.clip(rng.standard_normal(16000) * amplitude, -1.0, 1.0).astype(np.float32)
+        yield [waveform]
+
+def convert_to_tflite(loaded_model, quantize_int8: bool = False) -> bytes:
+    """
+    YamNetモデルを可変長入力のTFLiteモデルに変換する
+    
+    TFLiteの組み込み演算にないもの（STFT等）はSELECT_TF_OPSで実行する。
+    quantize_int8=Trueの場合は代表波形でキャリブレーションしてint8量子化する。
+    STFTの前処理は浮動小数点のまま実行する必要があるため、入出力はfloat32のままにする。
+    """
+    concrete_function = tf.function(loaded_model).get_concrete_function(
+        tf.TensorSpec(shape=[None], dtype=tf.float32)
+    )
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_function], loaded_model)
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS,
+    ]
+    if quantize_int8:
+        # 量子化できない演算（メル変換等）はfloat32の組み込み演算で実行する
+        converter.target_spec.supported_ops.insert(0, tf.lite.OpsSet.TFLITE_BUILTINS_INT8)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = tflite_representative_dataset
+    return converter.convert()
+
+def load_or_convert_tflite(loaded_model, model_path: str, quantize_int8: bool = False) -> bytes:
+    """
+    変換済みTFLiteモデルがmodel_pathにあれば読み込み、なければ変換して保存する
+    """
+    if os.path.exists(model_path):
+        print(f"📂 変換済みTFLiteモデルをロード中: {model_path}")
+        with open(model_path, 'rb') as f:
+            return f.read()
+    
+    print(f"🔄 YamNetをTFLiteに変換しています{'（int8量子化）' if quantize_int8 else ''}...")
+    tflite_model = convert_to_tflite(loaded_model, quantize_int8=quantize_int8)
+    try:
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        tmp_path = f"{model_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(tflite_model)
+        os.replace(tmp_path, model_path)
+        print(f"💾 TFLiteモデルを保存しました: {model_path}")
+    except Exception as e:
+        print(f"⚠️ TFLiteモデルの保存に失敗しました（処理は継続）: {e}")
+    return tflite_model
+
+def build_tflite_inference_function(loaded_model, quantize_int8: bool = False):
+    """
+    TFLiteインタープリタでYamNetを実行する推論関数を作成する
+    
+    変換済みモデルがあれば再利用し、なければ変換して保存する
+    （FP32はLOCAL_TFLITE_PATH、int8はLOCAL_TFLITE_INT8_PATH）。
+    インタープリタはスレッドセーフではないため、呼び出し側で直列化すること。
+    
+    Returns:
+        (scores, embeddings, log_mel_spectrogram) を返す推論関数
+    """
+    model_path = LOCAL_TFLITE_INT8_PATH if quantize_int8 else LOCAL_TFLITE_PATH
+    tflite_model = load_or_convert_tflite(loaded_model, model_path, quantize_int8=quantize_int8)
+    
+    num_threads = tf.config.threading.get_intra_op_parallelism_threads() or os.cpu_count()
+    interpreter = tf.lite.Interpreter(model_content=tflite_model, num_threads=num_threads)
+    runner = interpreter.get_signature_runner()
+    input_name = next(iter(runner.get_input_details()))
+    # 出力名は output_0, output_1, ... の順で (scores, embeddings, log_mel_spectrogram) に対応する
+    output_names = sorted(runner.get_output_details(), key=lambda name: int(name.rsplit('_', 1)[-1]))
+    
+    def infer(waveform):
+        # 入力長が変わった場合はSignatureRunnerがテンソルを再確保する
+        outputs = runner(**{input_name: waveform})
+        return tuple(tf.convert_to_tensor(outputs[name]) for name in output_names)
+    
+    return infer
+
+def load_class_names(loaded_model):
+    """
+    YamNetのクラス名（display_name）をCLASS_NAMES_ARRに読み込む
+    
+    ラベルの参照はすべて推論後に行われるため、モデルのロードと同時に読み込めば十分。
+    """
+    global CLASS_NAMES_ARR
+    if CLASS_MAP_PATH_OVERRIDE:
+        class_map_path = CLASS_MAP_PATH_OVERRIDE
+    else:
+        try:
+            class_map_path = loaded_model.class_map_path().numpy().decode('utf-8')
+        except Exception as e:
+            print(f"⚠️ モデル同梱のクラスマップを取得できませんでした。ダウンロードします: {e}")
+            class_map_path = tf.keras.utils.get_file('yamnet_class_map.csv', CLASS_MAP_URL)
+    
+    class_names = []
+    with open(class_map_path, 'r') as f:
+        reader = csv.reader(f)
+        next(reader)  # ヘッダーをスキップ
+        for row in reader:
+            class_names.append(row[2])
+    CLASS_NAMES_ARR = np.asarray(class_names, dtype=object)
+
+def load_local_model():
+    """
+    LOCAL_MODEL_DIRに保存済みのYamNet SavedModelを読み込む
+    
+    Returns:
+        読み込んだモデル。保存されていない・読み込めない場合はNone
+    """
+    if not os.path.exists(os.path.join(LOCAL_MODEL_DIR, 'saved_model.pb')):
+        print(f"ℹ️ ローカルSavedModelは未作成です: {LOCAL_MODEL_DIR}")
+        return None
+    
+    try:
+        print(f"📂 ローカルSavedModelをロード中: {LOCAL_MODEL_DIR}")
+        return tf.saved_model.load(LOCAL_MODEL_DIR)
+    except Exception as e:
+        print(f"⚠️ ローカルSavedModelのロードに失敗しました: {e}")
+        return None
+
+def clear_local_model_cache() -> List[str]:
+    """
+    ローカルに保存したモデル（SavedModel・TFLite・int8 TFLite）を削除する
+    
+    YamNetはLOCAL_MODEL_DIRを最優先で読み込むため、TensorFlow Hubキャッシュだけを
+    消しても壊れたローカルモデルが再利用される。ここで消すと次回はHubから再取得する。
+    
+    Returns:
+        削除したパスのリスト
+    """
+    cleared_paths = []
+    for path in (LOCAL_MODEL_DIR, LOCAL_TFLITE_PATH, LOCAL_TFLITE_INT8_PATH):
+        if not os.path.exists(path):
+            continue
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            cleared_paths.append(path)
+            print(f"✅ ローカルモデル削除成功: {path}")
+        except Exception as e:
+            print(f"❌ ローカルモデル削除失敗: {path} - {e}")
+    return cleared_paths
+
+def save_local_model(loaded_model):
+    """
+    YamNetモデルをLOCAL_MODEL_DIRにSavedModelとして保存する
+    
+    一時ディレクトリに書き出してから置き換えるため、保存途中の不完全な
+    モデルが次回起動時に読み込まれることはない。失敗しても処理は継続する。
+    """
+    tmp_dir = f"{LOCAL_MODEL_DIR}.tmp-{os.getpid()}"  # 複数ワーカーが同時に保存しても衝突しないようにする
+    try:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        tf.saved_model.save(loaded_model, tmp_dir)
+        if os.path.exists(LOCAL_MODEL_DIR):
+            shutil.rmtree(LOCAL_MODEL_DIR)
+        os.replace(tmp_dir, LOCAL_MODEL_DIR)
+        print(f"💾 ローカルSavedModelを保存しました: {LOCAL_MODEL_DIR}")
+    except Exception as e:
+        print(f"⚠️ ローカルSavedModelの保存に失敗しました（処理は継続）: {e}")
+
 def load_model_if_needed():
     """
     YamNetモデルの遅延ロード（自動回復機能付き）
@@ -262,10 +583,34 @@ def load_model_if_needed():
     2. 破損時の自動クリア
     3. 最大3回の自動リトライ
     4. 詳細なエラー情報の表示
+    
+    💾 ローカルに保存済みのSavedModel（LOCAL_MODEL_DIR）があればHubを経由せずに使用し、
+    Hubから取得した場合はLOCAL_MODEL_DIRに保存して次回以降の起動を高速化する
+    
+    Returns:
+        tf.functionでラップした推論関数（build_inference_function参照）
     """
-    global model
-    if model is None:
+    global model, model_infer, model_load_failed_at
+    if model is None or model_infer is None:
+        # 直前に全試行が失敗している場合は、リトライ処理（キャッシュ検証・待機）を繰り返さない
+        if model_load_failed_at is not None and time.time() - model_load_failed_at < MODEL_RETRY_COOLDOWN_SECONDS:
+            raise Exception(f"YamNetモデルは現在利用できません（ロード失敗から{MODEL_RETRY_COOLDOWN_SECONDS}秒間は再試行しません）")
+        
         print("🎯 YamNetモデルを必要に応じてロードします...")
+        
+        # 💾 Step 0: ローカルSavedModelからのロード（Hub解決・キャッシュ検証を省略）
+        local_model = load_local_model()
+        if local_model is not None:
+            try:
+                model_infer = build_inference_function(local_model)
+                load_class_names(local_model)
+                model = local_model
+                print("🎉 YamNetモデルのロード完了！（ローカルSavedModel）")
+                model_load_failed_at = None
+                return model_infer
+            except Exception as e:
+                print(f"⚠️ ローカルモデルの動作テストに失敗しました。TensorFlow Hubから再取得します: {e}")
+        
         max_attempts = 3
         
         for attempt in range(max_attempts):
@@ -284,16 +629,21 @@ def load_model_if_needed():
                 # 📥 Step 3: モデルダウンロード・ロード
                 print("📥 YamNetモデルをダウンロード中...")
                 os.environ['TFHUB_DOWNLOAD_PROGRESS'] = '1'
+                import tensorflow_hub as hub  # ローカルモデルがない場合のみ必要なため遅延インポート
                 model = hub.load('https://tfhub.dev/google/yamnet/1')
                 print("✅ モデルダウンロード完了")
                 
-                # 🧪 Step 4: 動作テスト
+                # ⚡ Step 4: 推論関数のコンパイル・動作テスト
                 print("🧪 モデル動作テストを実行中...")
-                dummy_waveform = np.zeros(16000, dtype=np.float32)
-                _ = model(dummy_waveform)
+                model_infer = build_inference_function(model)
+                load_class_names(model)
                 print("✅ モデル動作テスト成功")
                 
+                # 💾 Step 5: 次回起動用にローカルへ保存
+                save_local_model(model)
+                
                 print("🎉 YamNetモデルのロード完了！")
+                model_load_failed_at = None
                 break
                 
             except ValueError as e:
@@ -313,6 +663,8 @@ def load_model_if_needed():
                 else:
                     print("🚨 全ての試行が失敗しました")
                     model = None
+                    model_infer = None
+                    model_load_failed_at = time.time()
                     raise Exception(f"🚨 YamNetモデルロードに失敗しました（{max_attempts}回試行）\n"
                                   f"最後のエラー: {error_msg}\n"
                                   f"💡 対処法: READMEのトラブルシューティングセクションを確認してください")
@@ -330,20 +682,51 @@ def load_model_if_needed():
                     import traceback
                     traceback.print_exc()
                     model = None
+                    model_infer = None
+                    model_load_failed_at = time.time()
                     raise Exception(f"🚨 YamNetモデルロードに失敗しました（{max_attempts}回試行）\n"
                                   f"最後のエラー: {error_msg}\n"
                                   f"💡 対処法: READMEのトラブルシューティングセクションを確認してください")
     
-    return model
+    return model_infer
+
+@app.on_event("startup")
+async def preload_model():
+    """
+    サーバー起動時にYamNetをロード・ウォームアップし、初回リクエストの待ち時間をなくす
+    
+    失敗しても起動は継続し、各エンドポイントのload_model_if_needed()で再試行する。
+    """
+    try:
+        await run_in_inference_thread(load_model_if_needed)
+        print("🔥 起動時のモデルウォームアップが完了しました")
+    except Exception as e:
+        print(f"⚠️ 起動時のモデルロードに失敗しました（初回リクエスト時に再試行）: {e}")
+
+# YYYY-MM-DD形式の日付（strptimeの'%Y-%m-%d'と同じく月・日は1桁も許容する）
+DATE_PATTERN = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+def is_valid_date(date_str: str) -> bool:
+    """
+    日付文字列がYYYY-MM-DD形式の実在する日付かを判定する
+    
+    datetime.strptimeより軽い正規表現で形式を確認し、暦の妥当性はdatetimeの生成で確認する。
+    """
+    match = DATE_PATTERN.fullmatch(date_str)
+    if match is None:
+        return False
+    try:
+        datetime(int(match[1]), int(match[2]), int(match[3]))
+    except ValueError:
+        return False
+    return True
+
+# 24時間分の30分単位スロット（48個）。リクエストごとに再生成しないよう定数化
+TIME_SLOTS = tuple(f"{hour:02d}-{minute:02d}" for hour in range(24) for minute in (0, 30))
 
 def generate_time_slots():
-    """24時間分の30分単位スロットを生成（48個）"""
-    slots = []
-    for hour in range(24):
-        for minute in [0, 30]:
-            slot = f"{hour:02d}-{minute:02d}"
-            slots.append(slot)
-    return slots
+    """24時間分の30分単位スロットを返す（48個）"""
+    return TIME_SLOTS
 
 def convert_to_new_format(device_id: str, date: str, time_block: str, timeline_events: List[Dict], slot_timeline: List[Dict]):
     """
@@ -359,29 +742,17 @@ def convert_to_new_format(device_id: str, date: str, time_block: str, timeline_e
     Returns:
         新しい構造のevents配列
     """
-    # 全てのイベントを統合して、重複を除去
+    # 全てのイベントを統合して、重複を除去（同じラベルは最大確率を採用）
+    # timeline_eventsとslot_timeline（念のため）を1回の走査でまとめて処理する
     all_events = {}
-    
-    # timeline_eventsから抽出
-    for event in timeline_events:
-        label = event['label']
-        prob = event['prob']
-        
-        # 同じラベルがあった場合は最大確率を採用
-        if label in all_events:
-            all_events[label] = max(all_events[label], prob)
-        else:
-            all_events[label] = prob
-    
-    # slot_timelineからも抽出（念のため）
-    for slot in slot_timeline:
-        for event in slot['events']:
+    get_prob = all_events.get
+    slot_events = (event for slot in slot_timeline for event in slot['events'])
+    for source in (timeline_events, slot_events):
+        for event in source:
             label = event['label']
             prob = event['prob']
-            
-            if label in all_events:
-                all_events[label] = max(all_events[label], prob)
-            else:
+            current = get_prob(label)
+            if current is None or prob > current:
                 all_events[label] = prob
     
     # 新しい形式のevents配列を生成
@@ -407,21 +778,22 @@ def extract_info_from_file_path(file_path: str) -> dict:
 async def update_audio_files_status(file_path: str) -> bool:
     """audio_filesテーブルのbehavior_features_statusをcompletedに更新"""
     try:
-        update_response = supabase.table('audio_files') \
+        # 同期クライアントのため、イベントループを塞がないようスレッドで実行
+        query = supabase.table('audio_files') \
             .update({'behavior_features_status': 'completed'}) \
-            .eq('file_path', file_path) \
-            .execute()
+            .eq('file_path', file_path)
+        update_response = await asyncio.to_thread(query.execute)
         
         if update_response.data:
-            print(f"✅ audio_filesテーブルのステータス更新成功: {file_path}")
+            logger.info("✅ audio_filesテーブルのステータス更新成功: %s", file_path)
             return True
         else:
-            print(f"⚠️ audio_filesテーブルのステータス更新: 対象レコードが見つかりません - {file_path}")
+            logger.warning("⚠️ audio_filesテーブルのステータス更新: 対象レコードが見つかりません - %s", file_path)
             return False
             
     except Exception as e:
-        print(f"❌ audio_filesテーブルのステータス更新エラー: {str(e)}")
-        print(f"   file_path: {file_path}")
+        logger.error("❌ audio_filesテーブルのステータス更新エラー: %s", e)
+        logger.error("   file_path: %s", file_path)
         return False
 
 async def check_existing_data_in_supabase(device_id: str, date: str) -> Set[str]:
@@ -437,18 +809,49 @@ async def check_existing_data_in_supabase(device_id: str, date: str) -> Set[str]
     """
     try:
         # behavior_yamnetテーブルから該当するレコードを検索
-        response = supabase.table('behavior_yamnet').select('time_block').eq('device_id', device_id).eq('date', date).execute()
+        query = supabase.table('behavior_yamnet').select('time_block').eq('device_id', device_id).eq('date', date)
+        response = await asyncio.to_thread(query.execute)
         
         # 処理済みtime_blockのセットを作成
         existing_time_blocks = {item['time_block'] for item in response.data}
         
-        print(f"📊 Supabase確認: {len(existing_time_blocks)}件の処理済みスロット")
+        logger.info("📊 Supabase確認: %s件の処理済みスロット", len(existing_time_blocks))
         return existing_time_blocks
         
     except Exception as e:
-        print(f"❌ Supabase確認エラー: {str(e)}")
+        logger.error("❌ Supabase確認エラー: %s", e)
         return set()  # エラー時は空のセットを返す
 
+# アプリ全体で共有するHTTPセッション（初回利用時に作成し、アプリ終了時にクローズする）
+http_session = None
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    Vault API向けのHTTPセッションを作成する
+    
+    同一ホストへの多数のリクエストでkeep-alive接続とDNSキャッシュを再利用する。
+    """
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300, keepalive_timeout=75)
+    timeout = aiohttp.ClientTimeout(total=30)  # 30秒タイムアウト
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    アプリ全体で共有するHTTPセッションを取得する（未作成・クローズ済みなら作成する）
+    
+    リクエストをまたいで接続プールを共有し、TCP/TLSハンドシェイクを毎回行わないようにする。
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = create_http_session()
+    return http_session
+
+@app.on_event("shutdown")
+async def close_http_session():
+    """アプリ終了時に共有HTTPセッションをクローズする"""
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+
 async def check_audio_exists_in_vault(session: aiohttp.ClientSession, device_id: str, date: str, time_blocks: List[str]) -> Dict[str, bool]:
     """
     Vault APIで音声データの存在を確認（並列処理）
@@ -477,7 +880,7 @@ async def check_audio_exists_in_vault(session: aiohttp.ClientSession, device_id:
                 await response.read()
                 return (slot, response.status == 200)
         except Exception as e:
-            print(f"❌ Vault APIチェックエラー ({slot}): {str(e)}")
+            logger.error("❌ Vault APIチェックエラー (%s): %s", slot, e)
             return (slot, False)
     
     # 並列で全スロットをチェック
@@ -486,7 +889,7 @@ async def check_audio_exists_in_vault(session: aiohttp.ClientSession, device_id:
     # 辞書形式で返す
     exists_dict = dict(results)
     exists_count = sum(1 for exists in exists_dict.values() if exists)
-    print(f"🔍 Vault API確認: {exists_count}/{len(time_blocks)}件の音声データ存在")
+    logger.info("🔍 Vault API確認: %s/%s件の音声データ存在", exists_count, len(time_blocks))
     
     return exists_dict
 
@@ -511,20 +914,63 @@ async def save_to_supabase(device_id: str, date: str, time_block: str, events: L
             "events": events
         }
         
-        # UPSERTでデータを保存
-        result = supabase.table('behavior_yamnet').upsert(supabase_data).execute()
+        # UPSERTでデータを保存（同期クライアントのため、イベントループを塞がないようスレッドで実行）
+        result = await asyncio.to_thread(supabase.table('behavior_yamnet').upsert(supabase_data).execute)
         
         if result.data:
-            print(f"💾 Supabase保存成功: {time_block} ({len(events)}件のイベント)")
+            logger.info("💾 Supabase保存成功: %s (%s件のイベント)", time_block, len(events))
             return True
         else:
-            print(f"❌ Supabase保存失敗: {time_block}")
+            logger.error("❌ Supabase保存失敗: %s", time_block)
             return False
             
     except Exception as e:
-        print(f"❌ Supabase保存エラー: {time_block} - {str(e)}")
+        logger.error("❌ Supabase保存エラー: %s - %s", time_block, e)
         return False
 
+async def save_batch_to_supabase(device_id: str, date: str, slot_events: List[Tuple[str, List[Dict]]]) -> List[bool]:
+    """
+    複数スロットの結果をbehavior_yamnetテーブルに1回のUPSERTでまとめて保存する
+    
+    配列のUPSERTは1つのSQL文として実行され、1行でも失敗すると全体が失敗するため、
+    その場合はスロットごとの保存（save_to_supabase）にフォールバックする。
+    
+    Args:
+        device_id: デバイスID
+        date: 日付（YYYY-MM-DD）
+        slot_events: (時間ブロック, イベント配列) のリスト
+    
+    Returns:
+        slot_eventsと同じ順序の保存成功/失敗のリスト
+    """
+    if not slot_events:
+        return []
+    
+    try:
+        supabase_data = [
+            {
+                "device_id": device_id,
+                "date": date,
+                "time_block": time_block,
+                "events": events
+            }
+            for time_block, events in slot_events
+        ]
+        
+        # UPSERTでデータを一括保存（同期クライアントのため、イベントループを塞がないようスレッドで実行）
+        result = await asyncio.to_thread(supabase.table('behavior_yamnet').upsert(supabase_data).execute)
+        
+        if result.data:
+            logger.info("💾 Supabase一括保存成功: %sスロット", len(slot_events))
+            return [True] * len(slot_events)
+        logger.warning("⚠️ Supabase一括保存失敗、スロットごとに保存します")
+    except Exception as e:
+        logger.warning("⚠️ Supabase一括保存エラー、スロットごとに保存します: %s", e)
+    
+    return list(await asyncio.gather(*[
+        save_to_supabase(device_id, date, time_block, events)
+        for time_block, events in slot_events
+    ]))
 
 async def download_audio_file(session: aiohttp.ClientSession, device_id: str, date: str, slot: str):
     """
@@ -538,161 +984,611 @@ async def download_audio_file(session: aiohttp.ClientSession, device_id: str, da
     }
     
     try:
-        print(f"ダウンロード開始: {slot}")
+        logger.info("ダウンロード開始: %s", slot)
         async with session.get(url, params=params) as response:
             if response.status == 200:
                 content = await response.read()
-                print(f"ダウンロード成功: {slot} ({len(content)} bytes)")
+                logger.info("ダウンロード成功: %s (%s bytes)", slot, len(content))
                 return content
             elif response.status == 404:
-                print(f"ファイルが存在しません: {slot}")
+                logger.info("ファイルが存在しません: %s", slot)
                 return None
             else:
-                print(f"ダウンロードエラー: {slot} (status: {response.status})")
+                logger.error("ダウンロードエラー: %s (status: %s)", slot, response.status)
                 return None
     except Exception as e:
-        print(f"ダウンロード例外: {slot} - {str(e)}")
+        logger.error("ダウンロード例外: %s - %s", slot, e)
         return None
 
-def process_audio_data(audio_content: bytes, threshold: float = 0.2):
+@njit(cache=True, nogil=True)
+def _extract_events(scores, threshold):
     """
-    音声データを処理してタイムライン結果を生成する
-    （既存のtimelineエンドポイントの処理ロジックを抽出）
+    閾値以上の (フレーム, クラス, 確率) をフレーム昇順で抽出するNumbaカーネル
+
+    Args:
+        scores: YamNetのスコア（shape: [n_frames, n_classes]）
+        threshold: 確信度の閾値
+
+    Returns:
+        (frames, classes, probs) の配列タプル
+    """
+    n_frames, n_classes = scores.shape
+
+    # 1パス目: 該当件数を数えて出力配列を確保
+    count = 0
+    for i in range(n_frames):
+        for j in range(n_classes):
+            if scores[i, j] >= threshold:
+                count += 1
+
+    frames = np.empty(count, np.int64)
+    classes = np.empty(count, np.int64)
+    probs = np.empty(count, scores.dtype)  # スコアと同じ精度（float32）で保持する
+
+    # 2パス目: 該当要素を書き込み
+    k = 0
+    for i in range(n_frames):
+        for j in range(n_classes):
+            p = scores[i, j]
+            if p >= threshold:
+                frames[k] = i
+                classes[k] = j
+                probs[k] = p
+                k += 1
+
+    return frames, classes, probs
+
+def build_timeline(scores_np: np.ndarray, frame_duration: float, threshold: float):
+    """
+    YamNetのスコア行列から閾値以上のイベントを抽出し、タイムラインを生成する
+
+    フレーム×クラスの二重ループをNumPyの一括処理に置き換えたもの。
+    出力形式は従来のループ実装と同一。
+
+    Args:
+        scores_np: YamNetのスコア（shape: [n_frames, n_classes]）
+        frame_duration: 1フレームあたりの秒数
+        threshold: 確信度の閾値
+
+    Returns:
+        (timeline_events, slot_timeline) のタプル
+    """
+    n_frames = scores_np.shape[0]
+
+    # 閾値以上の (フレーム, クラス) の組を一括抽出（フレーム昇順）
+    frames, classes, raw_probs = _extract_events(np.ascontiguousarray(scores_np), float(threshold))
+    # 丸めは従来のround(float(prob), 2)と一致させるためfloat64で行う
+    probs = (np.rint(raw_probs.astype(np.float64) * PROB_ROUND) / PROB_ROUND).tolist()
+    # フレームごとの開始・終了時刻は1回だけ計算し、イベントへはインデックスで割り当てる
+    frame_edges = np.rint(np.arange(n_frames + 1) * frame_duration * PROB_ROUND) / PROB_ROUND
+    frame_starts = frame_edges[:-1]
+    frame_ends = frame_edges[1:]
+    starts = frame_starts[frames].tolist()
+    ends = frame_ends[frames].tolist()
+    labels = CLASS_NAMES_ARR[classes].tolist()
+
+    # 通常のタイムラインイベント
+    timeline_events = [
+        {"start": start, "end": end, "label": label, "prob": prob}
+        for start, end, label, prob in zip(starts, ends, labels, probs)
+    ]
+
+    # スロットタイムライン（イベントがないフレームも空リストで出力する）
+    # framesは昇順なので、値が変わる位置が各フレームの先頭になる（ソート不要のO(E)）
+    slot_events = [[] for _ in range(n_frames)]
+    first_index = np.flatnonzero(np.diff(frames, prepend=-1))
+    bounds = first_index.tolist() + [len(labels)]
+    for frame_idx, lo, hi in zip(frames[first_index].tolist(), bounds, bounds[1:]):
+        slot_events[frame_idx] = [
+            {"label": label, "prob": prob}
+            for label, prob in zip(labels[lo:hi], probs[lo:hi])
+        ]
+
+    slot_timeline = [
+        {"time": time, "events": events}
+        for time, events in zip(frame_starts.tolist(), slot_events)
+    ]
+
+    return timeline_events, slot_timeline
+
+@njit(cache=True, nogil=True)
+def _abs_max(audio):
+    """
+    波形の最大振幅（絶対値の最大）を求めるNumbaカーネル
+
+    np.abs(audio).max() と同じ結果を、絶対値の一時配列を作らずに1回の走査で計算する。
+    asyncio.to_threadで複数スレッドから同時に呼ばれるため、parallel=Trueは使わない
+    （workqueueスレッド層は同時呼び出しでプロセスごと異常終了する）。
+    """
+    max_abs = 0.0
+    for i in range(audio.shape[0]):
+        max_abs = max(max_abs, abs(audio[i]))
+    return max_abs
+
+@njit(cache=True, nogil=True)
+def _downmix_abs_max(audio):
+    """
+    多チャンネル波形をモノラル化し、同時に最大振幅を求めるNumbaカーネル
+
+    mean(axis=1) と _abs_max を1回の走査にまとめ、PCMバッファの読み書きを減らす。
+    _abs_maxと同じ理由でparallel=Trueは使わない。
+
+    Args:
+        audio: 多チャンネル波形（shape: [n_samples, n_channels]、float32）
+
+    Returns:
+        (モノラル波形, 最大振幅) のタプル
+    """
+    n_samples, n_channels = audio.shape
+    mono = np.empty(n_samples, np.float32)
+    max_abs = 0.0
+    for i in range(n_samples):
+        total = np.float32(0.0)
+        for c in range(n_channels):
+            total += audio[i, c]
+        value = total / np.float32(n_channels)
+        mono[i] = value
+        max_abs = max(max_abs, abs(value))
+    return mono, max_abs
+
+def _resample_to_16k(audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    モノラル波形を16kHzにリサンプリングする
+    
+    soxrがインストールされていればSIMD実装の帯域制限sinc補間を使い、
+    なければscipyのポリフェーズフィルタ（FFTベースのresampleより高速）を使う。
+    """
+    try:
+        import soxr
+    except ImportError:
+        soxr = None
+    
+    if soxr is not None:
+        return soxr.resample(audio_data, sample_rate, 16000, quality='HQ').astype(np.float32, copy=False)
+    
+    from scipy.signal import resample_poly  # 16kHz以外の入力時のみ必要なため遅延インポート
+    # 比はgcdで約分済み。分母が大きすぎる場合のみ近似してFIRのタップ数を抑える
+    ratio = Fraction(16000, sample_rate).limit_denominator(1000)
+    return resample_poly(audio_data, ratio.numerator, ratio.denominator).astype(np.float32, copy=False)
+
+@contextmanager
+def _pooled_buffer(n_values: int):
+    """
+    デコード用のfloat32作業バッファをプールから借りる（ブロックを抜けると返却する）
+    
+    プールのバッファが足りない場合は新しく確保し、返却時にプールへ入れる。
+    """
+    try:
+        buffer = _DECODE_BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        buffer = None
+    if buffer is None or len(buffer) < n_values:
+        buffer = np.empty(n_values, dtype=np.float32)
+    try:
+        yield buffer[:n_values]
+    finally:
+        if _DECODE_BUFFER_POOL.qsize() < DECODE_BUFFER_POOL_SIZE:
+            _DECODE_BUFFER_POOL.put(buffer)
+
+def _decode_output(stack: ExitStack, n_samples: int, n_channels: int, sample_rate: int) -> np.ndarray:
+    """
+    デコード結果を書き込む配列を用意する
+    
+    モノラル化・リサンプリングする場合はデコード結果が中間配列になるため、
+    プールの作業バッファを借りる（stackを抜けると返却される）。
+    """
+    n_values = n_samples * n_channels
+    if n_channels > 1 or sample_rate != 16000:
+        buffer = stack.enter_context(_pooled_buffer(n_values))
+    else:
+        buffer = np.empty(n_values, dtype=np.float32)
+    return buffer.reshape(n_samples, n_channels) if n_channels > 1 else buffer
+
+def _read_pcm16_wav(source, max_seconds: int, stack: ExitStack) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    16bit PCMのWAVをwaveモジュールとnp.frombufferで直接デコードする（高速パス）
+    
+    libsndfileを経由せずにサンプル列をそのままfloat32へ変換する。
+    16bit PCM以外（float WAV、WAVE_FORMAT_EXTENSIBLE等）や読めない場合はNoneを返す。
+    
+    Args:
+        source: WAVのファイルオブジェクトまたはファイルパス
+        max_seconds: 読み込む最大秒数
+        stack: デコード先に借りた作業バッファの返却を管理するExitStack
+    
+    Returns:
+        (波形, サンプルレート) のタプル。多チャンネルの場合の形状は [n_samples, n_channels]
     """
     try:
+        with wave.open(source, 'rb') as wav_file:
+            if wav_file.getsampwidth() != 2:
+                return None
+            n_channels = wav_file.getnchannels()
+            sample_rate = wav_file.getframerate()
+            raw = wav_file.readframes(int(max_seconds * sample_rate))
+    except (wave.Error, EOFError):
+        return None
+    
+    n_samples = len(raw) // (2 * n_channels)
+    pcm = np.frombuffer(raw, dtype='<i2', count=n_samples * n_channels)
+    audio_data = _decode_output(stack, n_samples, n_channels, sample_rate)
+    np.multiply(pcm.reshape(audio_data.shape), np.float32(1.0 / 32768.0), out=audio_data)
+    return audio_data, sample_rate
+
+def _preprocess_wav(content: Union[bytes, BinaryIO, str], max_seconds: int = 60) -> np.ndarray:
+    """
+    音声データをYamNet入力用の波形（16kHz・モノラル・float32）に変換する
+    
+    Args:
+        content: 音声ファイルのバイト列、ファイルオブジェクト、またはファイルパス
+                 （ファイルオブジェクト・パスはバイト列にコピーせず直接デコードする）
+        max_seconds: 処理対象とする最大秒数（超過分は切り詰める）
+    
+    Returns:
+        変換後の波形
+    
+    Raises:
+        ValueError: 音声ファイルの読み込みに失敗した場合
+    """
+    import soundfile as sf  # 起動時間短縮のため使用時にインポート
+    
+    # デコード結果が中間配列になる場合（モノラル化・リサンプリングする場合）は
+    # プールの作業バッファにデコードし、変換後の配列ができた時点で返却する
+    max_abs = None
+    integer_pcm = False  # 整数PCMはデコード結果が必ず[-1.0, 1.0]に収まる
+    with ExitStack() as stack:
         # ファイルの読み込み
+        # 先頭max_seconds秒分だけをfloat32で直接デコードし、不要な末尾とfloat64の中間配列を省く
+        # 16bit PCMのWAVはwaveモジュールの高速パス、それ以外はsoundfileでデコードする
         try:
-            audio_data, sample_rate = sf.read(io.BytesIO(audio_content))
-            print(f"ファイルを読み込みました: サンプルレート {sample_rate}Hz, 形状 {audio_data.shape}")
+            source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+            decoded = _read_pcm16_wav(source, max_seconds, stack)
+            if decoded is not None:
+                audio_data, sample_rate = decoded
+                integer_pcm = True
+            else:
+                if hasattr(source, 'seek'):
+                    source.seek(0)
+                with sf.SoundFile(source) as sound_file:
+                    sample_rate = sound_file.samplerate
+                    integer_pcm = sound_file.subtype.startswith('PCM_')
+                    max_frames = int(max_seconds * sample_rate)
+                    if sound_file.seekable():
+                        n_frames = max(0, min(max_frames, sound_file.frames))
+                        out = _decode_output(stack, n_frames, sound_file.channels, sample_rate)
+                        audio_data = sound_file.read(out=out)
+                    else:
+                        audio_data = sound_file.read(frames=max_frames, dtype='float32', always_2d=False)
+            logger.info("ファイルを読み込みました: サンプルレート %sHz, 形状 %s", sample_rate, audio_data.shape)
         except Exception as e:
-            print(f"音声ファイルの読み込みに失敗しました: {str(e)}")
-            return None
+            logger.error("音声ファイルの読み込みに失敗しました: %s", e)
+            raise ValueError(f"音声ファイルの読み込みに失敗しました: {str(e)}")
         
-        # モノラルに変換
+        # モノラルに変換（最大振幅も同じ走査で求める）
         if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            audio_data = np.mean(audio_data, axis=1)
-            print(f"ステレオからモノラルに変換しました: 新しい形状 {audio_data.shape}")
+            audio_data, max_abs = _downmix_abs_max(np.ascontiguousarray(audio_data))
+            logger.info("ステレオからモノラルに変換しました: 新しい形状 %s", audio_data.shape)
         
         # YamNetの入力要件に合わせてサンプルレートを変換（必要な場合）
         if sample_rate != 16000:
-            print(f"サンプルレートが16kHzではありません: {sample_rate}Hz、リサンプリングを行います...")
-            # scipyのsignalモジュールを使用してリサンプリング
-            number_of_samples = round(len(audio_data) * 16000 / sample_rate)
-            audio_data = signal.resample(audio_data, number_of_samples)
-            print(f"リサンプリング完了: {sample_rate}Hz → 16000Hz, 新しい形状 {audio_data.shape}")
-            # サンプルレートを16000に設定
-            sample_rate = 16000
-        
-        # データ型を確認し、必要に応じて変換
-        if audio_data.dtype != np.float32:
-            print(f"データ型を変換: {audio_data.dtype} → float32")
-            audio_data = audio_data.astype(np.float32)
-        
-        # 振幅を適切な範囲に正規化（-1.0 〜 1.0）
-        max_abs = np.max(np.abs(audio_data))
-        if max_abs > 1.0:
-            print(f"オーディオデータを正規化します。最大振幅: {max_abs}")
-            audio_data = audio_data / max_abs
-        
-        # 最大60秒までに制限（1分間だけを処理対象）
-        MAX_AUDIO_LENGTH = 60 * 16000  # 最大60秒まで処理
-        if len(audio_data) > MAX_AUDIO_LENGTH:
-            print(f"オーディオファイルが長すぎるため60秒に切り詰めます: {len(audio_data)/16000:.2f}秒 → 60秒")
-            audio_data = audio_data[:MAX_AUDIO_LENGTH]
+            logger.info("サンプルレートが16kHzではありません: %sHz、リサンプリングを行います...", sample_rate)
+            audio_data = _resample_to_16k(audio_data, sample_rate)
+            max_abs = None  # リサンプリングで振幅が変わるため再計算する
+            logger.info("リサンプリング完了: %sHz → 16000Hz, 新しい形状 %s", sample_rate, audio_data.shape)
+    
+    # 振幅を適切な範囲に正規化（-1.0 〜 1.0）
+    # 新しい配列を確保せず、逆数の乗算でインプレースにスケーリングする
+    # リサンプリングしていない整数PCMは正規化が不要なため、最大振幅の走査を省く
+    if max_abs is None and not (integer_pcm and sample_rate == 16000):
+        max_abs = _abs_max(audio_data)
+    if max_abs is not None and max_abs > 1.0:
+        logger.info("オーディオデータを正規化します。最大振幅: %s", max_abs)
+        np.multiply(audio_data, np.float32(1.0 / max_abs), out=audio_data)
+    
+    # 最大max_seconds秒までに制限
+    max_samples = max_seconds * 16000
+    if len(audio_data) > max_samples:
+        logger.info("オーディオファイルが長すぎるため%s秒に切り詰めます: %.2f秒 → %s秒", max_seconds, len(audio_data)/16000, max_seconds)
+        audio_data = audio_data[:max_samples]
+    
+    return audio_data
+
+def build_timeline_result(scores_np: np.ndarray, num_samples: int, threshold: float) -> dict:
+    """
+    1ファイル分のスコア行列からタイムライン結果を生成する
+    
+    Args:
+        scores_np: YamNetのスコア（shape: [n_frames, n_classes]）
+        num_samples: 入力波形のサンプル数（16kHz）
+        threshold: 確信度の閾値
+    """
+    # YamNetのフレーム時間（通常約0.96秒）を計算
+    # スコアの形状から推定：scores.shape[0]はフレーム数
+    n_frames = scores_np.shape[0]
+    audio_duration = num_samples / 16000
+    frame_duration = audio_duration / n_frames
+    
+    timeline_events, slot_timeline = build_timeline(scores_np, frame_duration, threshold)
+    
+    logger.info("タイムライン作成完了: %s件のイベント、%s個のタイムスロット", len(timeline_events), len(slot_timeline))
+    return {
+        "timeline": timeline_events,
+        "slot_timeline": slot_timeline
+    }
+
+def process_audio_data(audio_content: Union[bytes, BinaryIO, str], threshold: float = 0.2):
+    """
+    音声データを処理してタイムライン結果を生成する
+    （既存のtimelineエンドポイントの処理ロジックを抽出）
+    """
+    try:
+        try:
+            audio_data = _preprocess_wav(audio_content, max_seconds=60)
+        except ValueError:
+            return None
         
         # モデルを必要時にロード
         try:
-            print("モデルをロードします...")
+            logger.info("モデルをロードします...")
             current_model = load_model_if_needed()
-            print("モデルのロードに成功しました")
+            logger.info("モデルのロードに成功しました")
         except Exception as e:
-            print(f"モデルのロードに失敗しました: {str(e)}")
+            logger.error("モデルのロードに失敗しました: %s", e)
             return None
         
         # YamNetでの推論
         try:
-            print("推論を実行します...")
-            scores, embeddings, log_mel_spectrogram = current_model(audio_data)
-            print(f"推論に成功しました: スコアの形状 {scores.shape}")
+            logger.info("推論を実行します...")
+            # 埋め込みとメルスペクトログラムは使わないため、スコア以外はすぐに解放する
+            scores = current_model(audio_data)[0]
+            # スコアはここで一度だけNumPy配列に変換し、以降はscores_npを参照する
+            scores_np = scores.numpy()
+            logger.info("推論に成功しました: スコアの形状 %s", scores_np.shape)
         except Exception as e:
-            print(f"推論の実行に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("推論の実行に失敗しました: %s", e)
             return None
         
         # タイムラインの作成
         try:
-            print("タイムラインを作成しています...")
-            
-            # YamNetのフレーム時間（通常約0.96秒）を計算
-            # スコアの形状から推定：scores.shape[0]はフレーム数
-            n_frames = scores.shape[0]
-            audio_duration = len(audio_data) / sample_rate
-            frame_duration = audio_duration / n_frames
-            
-            timeline_events = []
-            
-            # スロットタイムライン用のデータ構造
-            slot_events = {}  # time -> events[]
-            
-            for frame_idx in range(n_frames):
-                # 現在のフレームのスコア
-                frame_scores = scores[frame_idx].numpy()
-                
-                # フレームの開始時間を計算
-                start_time = frame_idx * frame_duration
-                
-                # スロットタイムライン用の時間（開始時間をキーとする）
-                slot_time = round(start_time, 2)
-                
-                # スロット用のイベントリスト初期化
-                if slot_time not in slot_events:
-                    slot_events[slot_time] = []
-                
-                # 閾値以上のイベントを抽出
-                for class_idx in range(len(frame_scores)):
-                    prob = float(frame_scores[class_idx])
-                    if prob >= threshold:
-                        # 該当フレームの開始・終了時間を計算
-                        start_time = frame_idx * frame_duration
-                        end_time = (frame_idx + 1) * frame_duration
-                        
-                        # 通常のタイムラインイベントを追加
-                        timeline_events.append({
-                            "start": round(start_time, 2),
-                            "end": round(end_time, 2),
-                            "label": class_names[class_idx],
-                            "prob": round(prob, 2)
-                        })
-                        
-                        # スロットタイムラインにイベントを追加
-                        slot_events[slot_time].append({
-                            "label": class_names[class_idx],
-                            "prob": round(prob, 2)
-                        })
-            
-            # スロットタイムラインを時系列順に整列
-            slot_timeline = [
-                {"time": time, "events": events}
-                for time, events in sorted(slot_events.items())
-            ]
-            
-            print(f"タイムライン作成完了: {len(timeline_events)}件のイベント、{len(slot_timeline)}個のタイムスロット")
-            return {
-                "timeline": timeline_events,
-                "slot_timeline": slot_timeline
-            }
+            logger.info("タイムラインを作成しています...")
+            return build_timeline_result(scores_np, len(audio_data), threshold)
         except Exception as e:
-            print(f"タイムラインの作成に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("タイムラインの作成に失敗しました: %s", e)
             return None
         
     except Exception as e:
-        print(f"音声処理中に予期しないエラーが発生しました: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("音声処理中に予期しないエラーが発生しました: %s", e)
+        return None
+
+def yamnet_frame_count(num_samples: int) -> int:
+    """
+    YamNetが波形に対して出力するフレーム数を求める
+    
+    YamNetは波形を最低1パッチ分（0.975秒）にパディングし、以降は0.48秒ホップ単位で
+    末尾をゼロ埋めしてフレーム化する。
+    """
+    samples_after_first_patch = max(0, num_samples - YAMNET_PATCH_SAMPLES)
+    return 1 + -(-samples_after_first_patch // YAMNET_HOP_SAMPLES)
+
+def infer_scores_batch(waveforms: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    複数の波形を1回のYamNet推論でまとめて処理し、波形ごとのスコアを返す
+    
+    各波形をホップ境界に揃えて無音で区切りながら連結し、推論後にスコアを
+    波形ごとのフレーム範囲で切り出す。区切りの無音により境界をまたぐ
+    フレームは破棄されるため、各波形の結果は単独推論と同じになる。
+    
+    Args:
+        waveforms: 前処理済みの波形（16kHz・モノラル・float32）のリスト
+    
+    Returns:
+        waveformsと同じ順序のスコア配列リスト（shape: [n_frames, n_classes]）
+    """
+    # 各波形の配置（開始フレーム・フレーム数）を計算
+    # 最終パッチが次の波形に掛からないよう、フレーム数+2ホップ分の領域を割り当てる
+    layout = []
+    offset_frames = 0
+    for waveform in waveforms:
+        n_frames = yamnet_frame_count(len(waveform))
+        layout.append((offset_frames, n_frames))
+        offset_frames += n_frames + YAMNET_BATCH_GAP_HOPS
+    
+    batch = np.zeros(offset_frames * YAMNET_HOP_SAMPLES, dtype=np.float32)
+    for waveform, (start_frame, _) in zip(waveforms, layout):
+        start = start_frame * YAMNET_HOP_SAMPLES
+        batch[start:start + len(waveform)] = waveform
+    
+    # YamNetでの推論（バッチ全体で1回）
+    current_model = load_model_if_needed()
+    logger.info("バッチ推論を実行します: %s件, %.2f秒", len(layout), len(batch)/16000)
+    # 埋め込みとメルスペクトログラムは使わないため、スコア以外はすぐに解放する
+    scores = current_model(batch)[0]
+    scores_np = scores.numpy()
+    logger.info("推論に成功しました: スコアの形状 %s", scores_np.shape)
+    
+    return [scores_np[start_frame:start_frame + n_frames] for start_frame, n_frames in layout]
+
+def process_batch_audio_data(contents: List[Union[bytes, str]], threshold: float = 0.2) -> List[Optional[dict]]:
+    """
+    複数スロットの音声データを1回のYamNet推論でまとめて処理する
+    （推論と切り出しはinfer_scores_batch参照）
+    
+    Args:
+        contents: 音声データ（バイト列またはファイルパス）のリスト
+        threshold: 確信度の閾値
+    
+    Returns:
+        contentsと同じ順序のタイムライン結果リスト（失敗したスロットはNone）
+    """
+    results: List[Optional[dict]] = [None] * len(contents)
+    
+    try:
+        waveforms: List[Optional[np.ndarray]] = []
+        for content in contents:
+            try:
+                waveforms.append(_preprocess_wav(content, max_seconds=60))
+            except Exception as e:
+                logger.error("❌ 前処理失敗: %s", e)
+                waveforms.append(None)
+        valid = [i for i, waveform in enumerate(waveforms) if waveform is not None]
+        if not valid:
+            return results
+        
+        # モデルを必要時にロード
+        try:
+            logger.info("モデルをロードします...")
+            load_model_if_needed()
+            logger.info("モデルのロードに成功しました")
+        except Exception as e:
+            logger.error("モデルのロードに失敗しました: %s", e)
+            return results
+        
+        # YamNetでの推論（バッチ全体で1回）
+        try:
+            batch_scores = infer_scores_batch([waveforms[i] for i in valid])
+        except Exception as e:
+            logger.exception("推論の実行に失敗しました: %s", e)
+            return results
+        
+        # スロットごとのスコアからタイムラインを作成
+        for i, slot_scores in zip(valid, batch_scores):
+            try:
+                results[i] = build_timeline_result(slot_scores, len(waveforms[i]), threshold)
+            except Exception as e:
+                logger.exception("タイムラインの作成に失敗しました: %s", e)
+        
+        return results
+        
+    except Exception as e:
+        logger.exception("バッチ音声処理中に予期しないエラーが発生しました: %s", e)
+        return results
+
+async def run_in_inference_thread(func, *args):
+    """
+    YamNetを使う同期処理を推論専用スレッドで実行する
+    
+    イベントループをブロックせず、かつモデルへのアクセスを1スレッドに直列化する。
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, func, *args)
+
+async def infer_scores_microbatched(waveform: np.ndarray) -> np.ndarray:
+    """
+    アップロード系エンドポイントの推論をマイクロバッチ経由で実行する
+    
+    推論は1スレッドで直列実行されるため、実行中に到着したリクエストは
+    キューに溜まり、次の推論でUPLOAD_BATCH_MAX件までまとめて処理される。
+    単独のリクエストは待ち時間なしでそのまま推論する。
+    
+    Returns:
+        この波形のスコア（shape: [n_frames, n_classes]）
+    """
+    global upload_batch_queue, upload_batch_task
+    if upload_batch_queue is None:
+        upload_batch_queue = asyncio.Queue()
+    # ワーカーが異常終了していた場合は作り直す（キューに残ったリクエストは新しいワーカーが処理する）
+    if upload_batch_task is None or upload_batch_task.done():
+        upload_batch_task = asyncio.create_task(_upload_batch_worker(upload_batch_queue))
+    
+    future = asyncio.get_running_loop().create_future()
+    await upload_batch_queue.put((waveform, future))
+    return await future
+
+async def _upload_batch_worker(batch_queue: asyncio.Queue):
+    """
+    マイクロバッチのキューを処理し続けるバックグラウンドタスク
+    """
+    while True:
+        items = [await batch_queue.get()]
+        while len(items) < UPLOAD_BATCH_MAX and not batch_queue.empty():
+            items.append(batch_queue.get_nowait())
+        
+        # 切断などで待機をやめたリクエストは推論しない
+        items = [(waveform, future) for waveform, future in items if not future.done()]
+        if not items:
+            continue
+        
+        error = None
+        try:
+            batch_scores = await run_in_inference_thread(infer_scores_batch, [waveform for waveform, _ in items])
+            for (_, future), scores_np in zip(items, batch_scores):
+                if not future.done():
+                    future.set_result(scores_np)
+        except Exception as e:
+            error = e
+        finally:
+            # 推論の失敗・タスクのキャンセル・結果数の不一致のいずれでも、待機中のリクエストを放置しない
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(error or RuntimeError("マイクロバッチ推論の結果を取得できませんでした"))
+
+def _inference_worker_init(intra_op_threads: int):
+    """
+    推論ワーカープロセスの初期化（プロセスごとにYamNetを1回だけロードする）
+    """
+    # ワーカー間でCPUコアを取り合わないようにTFのスレッド数を制限する
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    try:
+        load_model_if_needed()
+    except Exception as e:
+        # ここで例外を送出するとプール全体が使えなくなるため、初回推論時の再ロードに任せる
+        print(f"⚠️ 推論ワーカーでのモデルロードに失敗しました（初回推論時に再試行）: {e}")
+    print(f"👷 推論ワーカーを起動しました: pid={os.getpid()}")
+
+def _inference_worker_run(contents: List[Union[bytes, str]], threshold: float) -> List[Optional[dict]]:
+    """
+    推論ワーカープロセスでバッチを処理する
+    """
+    return process_batch_audio_data(contents, threshold)
+
+def get_inference_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    timeline-v2用の推論プロセスプールを取得する（未起動なら起動する）
+    
+    TensorFlowはfork後の子プロセスで安全に動作しないため、spawnで起動する。
+    V2_INFERENCE_PROCESSESが0以下の場合はNoneを返す。
+    """
+    global inference_pool
+    if V2_INFERENCE_PROCESSES <= 0:
         return None
+    if inference_pool is None:
+        intra_op_threads = max(1, (os.cpu_count() or 1) // V2_INFERENCE_PROCESSES)
+        print(f"🚀 推論ワーカープロセスを起動します: {V2_INFERENCE_PROCESSES}プロセス（各{intra_op_threads}スレッド）")
+        inference_pool = ProcessPoolExecutor(
+            max_workers=V2_INFERENCE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inference_worker_init,
+            initargs=(intra_op_threads,)
+        )
+    return inference_pool
+
+def reset_inference_pool(broken_pool: ProcessPoolExecutor):
+    """
+    壊れた推論プロセスプールを破棄し、次回のget_inference_poolで再起動させる
+    
+    ワーカーが異常終了（OOM killなど）するとプールはBrokenProcessPoolのまま復帰しないため。
+    """
+    global inference_pool
+    if inference_pool is broken_pool:  # 並行リクエストが先に再起動済みの場合は新しいプールを残す
+        inference_pool = None
+    broken_pool.shutdown(wait=False)
+
+async def run_batch_inference(contents: List[Union[bytes, str]], threshold: float) -> List[Optional[dict]]:
+    """
+    バッチ推論を推論プロセスプールで実行する（プールがない場合は推論専用スレッドで実行）
+    
+    ワーカーの異常終了でプールが壊れた場合は、プールを破棄したうえで
+    そのバッチを推論専用スレッドで処理し直す。
+    """
+    pool = get_inference_pool()
+    if pool is not None:
+        try:
+            return await asyncio.wrap_future(pool.submit(_inference_worker_run, contents, threshold))
+        except BrokenProcessPool as e:
+            logger.error("❌ 推論ワーカープロセスが異常終了しました。プールを再起動し、このバッチは推論スレッドで処理します: %s", e)
+            reset_inference_pool(pool)
+    return await run_in_inference_thread(process_batch_audio_data, contents, threshold)
 
 class SEDResult(BaseModel):
     sed: List[Dict[str, Any]]
@@ -719,6 +1615,7 @@ class SummaryItem(BaseModel):
     start: float
     end: float
     labels: List[str]
+    events: List[EventItem] = []  # セグメント平均スコアの上位イベント（確信度付き）
 
 class SummaryResult(BaseModel):
     summary: List[SummaryItem]
@@ -758,95 +1655,58 @@ async def analyze_sed(file: UploadFile = File(...), top_n: int = 20):
         raise HTTPException(status_code=400, detail="WAVファイル形式のみサポートしています")
     
     try:
-        # ファイルの読み込み
-        content = await file.read()
+        # ファイルの読み込みと前処理（アップロードのスプールファイルから直接デコード）
         try:
-            audio_data, sample_rate = sf.read(io.BytesIO(content))
-            print(f"ファイルを読み込みました: サンプルレート {sample_rate}Hz, 形状 {audio_data.shape}")
-        except Exception as e:
-            print(f"音声ファイルの読み込みに失敗しました: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"音声ファイルの読み込みに失敗しました: {str(e)}")
-        
-        # モノラルに変換
-        if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            audio_data = np.mean(audio_data, axis=1)
-            print(f"ステレオからモノラルに変換しました: 新しい形状 {audio_data.shape}")
-        
-        # YamNetの入力要件に合わせてサンプルレートを変換（必要な場合）
-        if sample_rate != 16000:
-            print(f"サンプルレートが16kHzではありません: {sample_rate}Hz、リサンプリングを行います...")
-            # scipyのsignalモジュールを使用してリサンプリング
-            number_of_samples = round(len(audio_data) * 16000 / sample_rate)
-            audio_data = signal.resample(audio_data, number_of_samples)
-            print(f"リサンプリング完了: {sample_rate}Hz → 16000Hz, 新しい形状 {audio_data.shape}")
-            # サンプルレートを16000に設定
-            sample_rate = 16000
-        
-        # データ型を確認し、必要に応じて変換
-        if audio_data.dtype != np.float32:
-            print(f"データ型を変換: {audio_data.dtype} → float32")
-            audio_data = audio_data.astype(np.float32)
-        
-        # 振幅を適切な範囲に正規化（-1.0 〜 1.0）
-        max_abs = np.max(np.abs(audio_data))
-        if max_abs > 1.0:
-            print(f"オーディオデータを正規化します。最大振幅: {max_abs}")
-            audio_data = audio_data / max_abs
-        
-        # 長すぎるオーディオファイルを処理するための対応
-        MAX_AUDIO_LENGTH = 10 * 16000  # 最大10秒まで処理
-        if len(audio_data) > MAX_AUDIO_LENGTH:
-            print(f"オーディオファイルが長すぎるため切り詰めます: {len(audio_data)/16000:.2f}秒 → 10秒")
-            audio_data = audio_data[:MAX_AUDIO_LENGTH]
+            audio_data = await asyncio.to_thread(_preprocess_wav, file.file, 10)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # モデルを必要時にロード
         try:
-            print("モデルをロードします...")
-            current_model = load_model_if_needed()
-            print("モデルのロードに成功しました")
+            logger.info("モデルをロードします...")
+            await run_in_inference_thread(load_model_if_needed)
+            logger.info("モデルのロードに成功しました")
         except Exception as e:
-            print(f"モデルのロードに失敗しました: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"モデルのロードに失敗しました: {str(e)}")
+            logger.error("モデルのロードに失敗しました: %s", e)
+            raise HTTPException(status_code=503, detail=f"モデルのロードに失敗しました: {str(e)}")
         
         # YamNetでの推論
         try:
-            print("推論を実行します...")
-            scores, embeddings, log_mel_spectrogram = current_model(audio_data)
-            print("推論に成功しました")
+            logger.info("推論を実行します...")
+            # 同時に届いた他のリクエストとまとめて推論する
+            scores_np = await infer_scores_microbatched(audio_data)
+            logger.info("推論に成功しました")
         except Exception as e:
-            print(f"推論の実行に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("推論の実行に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"推論の実行に失敗しました: {str(e)}")
         
         # スコアの平均を計算して上位のイベントを取得
         try:
-            print("結果を処理しています...")
-            class_scores = tf.reduce_mean(scores, axis=0).numpy()
-            top_indices = np.argsort(class_scores)[-top_n:][::-1]
-        
-            # 結果の生成
-            results = []
-            for i in top_indices:
-                results.append({
-                    "label": class_names[i],
-                    "prob": float(class_scores[i])
-                })
-            print(f"処理に成功しました: {len(results)}件の結果")
+            logger.info("結果を処理しています...")
+            class_scores = scores_np.mean(axis=0)
+            
+            # 上位top_n件だけを部分選択（O(n)）し、その範囲だけを降順ソートする
+            num_classes = len(class_scores)
+            k = min(top_n, num_classes) if top_n > 0 else num_classes
+            top_part = np.argpartition(class_scores, -k)[-k:]
+            top_indices = top_part[np.argsort(-class_scores[top_part], kind='stable')]
+        
+            # 結果の生成（ラベル・確率はインデックス配列で一括取得）
+            results = [
+                {"label": label, "prob": prob}
+                for label, prob in zip(CLASS_NAMES_ARR[top_indices].tolist(), class_scores[top_indices].tolist())
+            ]
+            logger.info("処理に成功しました: %s件の結果", len(results))
             return {"sed": results}
         except Exception as e:
-            print(f"結果の処理に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("結果の処理に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"結果の処理に失敗しました: {str(e)}")
         
     except HTTPException:
         # 既に適切なHTTPExceptionが発生している場合はそのまま再発生
         raise
     except Exception as e:
-        print(f"予期しないエラーが発生しました: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("予期しないエラーが発生しました: %s", e)
         raise HTTPException(status_code=500, detail=f"音声分析中に予期しないエラーが発生しました: {str(e)}")
 
 @app.post("/analyze/sed/timeline", response_model=TimelineResult)
@@ -867,150 +1727,57 @@ async def analyze_sed_timeline(file: UploadFile = File(...), threshold: Optional
         raise HTTPException(status_code=400, detail="WAVファイル形式のみサポートしています")
     
     try:
-        # ファイルの読み込み
-        content = await file.read()
+        # ファイルの読み込みと前処理（アップロードのスプールファイルから直接デコード）
         try:
-            audio_data, sample_rate = sf.read(io.BytesIO(content))
-            print(f"ファイルを読み込みました: サンプルレート {sample_rate}Hz, 形状 {audio_data.shape}")
-        except Exception as e:
-            print(f"音声ファイルの読み込みに失敗しました: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"音声ファイルの読み込みに失敗しました: {str(e)}")
-        
-        # モノラルに変換
-        if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            audio_data = np.mean(audio_data, axis=1)
-            print(f"ステレオからモノラルに変換しました: 新しい形状 {audio_data.shape}")
-        
-        # YamNetの入力要件に合わせてサンプルレートを変換（必要な場合）
-        if sample_rate != 16000:
-            print(f"サンプルレートが16kHzではありません: {sample_rate}Hz、リサンプリングを行います...")
-            # scipyのsignalモジュールを使用してリサンプリング
-            number_of_samples = round(len(audio_data) * 16000 / sample_rate)
-            audio_data = signal.resample(audio_data, number_of_samples)
-            print(f"リサンプリング完了: {sample_rate}Hz → 16000Hz, 新しい形状 {audio_data.shape}")
-            # サンプルレートを16000に設定
-            sample_rate = 16000
-        
-        # データ型を確認し、必要に応じて変換
-        if audio_data.dtype != np.float32:
-            print(f"データ型を変換: {audio_data.dtype} → float32")
-            audio_data = audio_data.astype(np.float32)
-        
-        # 振幅を適切な範囲に正規化（-1.0 〜 1.0）
-        max_abs = np.max(np.abs(audio_data))
-        if max_abs > 1.0:
-            print(f"オーディオデータを正規化します。最大振幅: {max_abs}")
-            audio_data = audio_data / max_abs
-        
-        # 最大60秒までに制限（1分間だけを処理対象）
-        MAX_AUDIO_LENGTH = 60 * 16000  # 最大60秒まで処理
-        if len(audio_data) > MAX_AUDIO_LENGTH:
-            print(f"オーディオファイルが長すぎるため60秒に切り詰めます: {len(audio_data)/16000:.2f}秒 → 60秒")
-            audio_data = audio_data[:MAX_AUDIO_LENGTH]
+            audio_data = await asyncio.to_thread(_preprocess_wav, file.file, 60)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # モデルを必要時にロード
         try:
-            print("モデルをロードします...")
-            current_model = load_model_if_needed()
-            print("モデルのロードに成功しました")
+            logger.info("モデルをロードします...")
+            await run_in_inference_thread(load_model_if_needed)
+            logger.info("モデルのロードに成功しました")
         except Exception as e:
-            print(f"モデルのロードに失敗しました: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"モデルのロードに失敗しました: {str(e)}")
+            logger.error("モデルのロードに失敗しました: %s", e)
+            raise HTTPException(status_code=503, detail=f"モデルのロードに失敗しました: {str(e)}")
         
         # YamNetでの推論
         try:
-            print("推論を実行します...")
-            scores, embeddings, log_mel_spectrogram = current_model(audio_data)
-            print(f"推論に成功しました: スコアの形状 {scores.shape}")
+            logger.info("推論を実行します...")
+            # 同時に届いた他のリクエストとまとめて推論する（スコアはNumPy配列で返る）
+            scores_np = await infer_scores_microbatched(audio_data)
+            logger.info("推論に成功しました: スコアの形状 %s", scores_np.shape)
         except Exception as e:
-            print(f"推論の実行に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("推論の実行に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"推論の実行に失敗しました: {str(e)}")
         
         # タイムラインの作成
         try:
-            print("タイムラインを作成しています...")
-            
-            # YamNetのフレーム時間（通常約0.96秒）を計算
-            # スコアの形状から推定：scores.shape[0]はフレーム数
-            n_frames = scores.shape[0]
-            audio_duration = len(audio_data) / sample_rate
-            frame_duration = audio_duration / n_frames
-            
-            timeline_events = []
-            
-            # スロットタイムライン用のデータ構造
-            slot_events = {}  # time -> events[]
-            
-            for frame_idx in range(n_frames):
-                # 現在のフレームのスコア
-                frame_scores = scores[frame_idx].numpy()
-                
-                # フレームの開始時間を計算
-                start_time = frame_idx * frame_duration
-                
-                # スロットタイムライン用の時間（開始時間をキーとする）
-                slot_time = round(start_time, 2)
-                
-                # スロット用のイベントリスト初期化
-                if slot_time not in slot_events:
-                    slot_events[slot_time] = []
-                
-                # 閾値以上のイベントを抽出
-                for class_idx in range(len(frame_scores)):
-                    prob = float(frame_scores[class_idx])
-                    if prob >= threshold:
-                        # 該当フレームの開始・終了時間を計算
-                        start_time = frame_idx * frame_duration
-                        end_time = (frame_idx + 1) * frame_duration
-                        
-                        # 通常のタイムラインイベントを追加
-                        timeline_events.append({
-                            "start": round(start_time, 2),
-                            "end": round(end_time, 2),
-                            "label": class_names[class_idx],
-                            "prob": round(prob, 2)
-                        })
-                        
-                        # スロットタイムラインにイベントを追加
-                        slot_events[slot_time].append({
-                            "label": class_names[class_idx],
-                            "prob": round(prob, 2)
-                        })
-            
-            # スロットタイムラインを時系列順に整列
-            slot_timeline = [
-                {"time": time, "events": events}
-                for time, events in sorted(slot_events.items())
-            ]
-            
-            print(f"タイムライン作成完了: {len(timeline_events)}件のイベント、{len(slot_timeline)}個のタイムスロット")
-            return {
-                "timeline": timeline_events,
-                "slot_timeline": slot_timeline
-            }
+            logger.info("タイムラインを作成しています...")
+            return build_timeline_result(scores_np, len(audio_data), threshold)
         except Exception as e:
-            print(f"タイムラインの作成に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("タイムラインの作成に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"タイムラインの作成に失敗しました: {str(e)}")
         
     except HTTPException:
         # 既に適切なHTTPExceptionが発生している場合はそのまま再発生
         raise
     except Exception as e:
-        print(f"予期しないエラーが発生しました: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("予期しないエラーが発生しました: %s", e)
         raise HTTPException(status_code=500, detail=f"音声分析中に予期しないエラーが発生しました: {str(e)}")
 
-@app.post("/analyze/sed/timeline-v2", response_model=TimelineV2Result)
+@app.post("/analyze/sed/timeline-v2", response_model=TimelineV2Result, response_class=ORJSONResponse)
 async def analyze_sed_timeline_v2(request: TimelineV2Request, threshold: Optional[float] = 0.2):
     """
-    EC2上の音声ファイルを逐次処理してタイムライン分析を実行する。
+    EC2上の音声ファイルを並行処理してタイムライン分析を実行する。
+    ダウンロード・保存は並行実行し、推論はV2_BATCH_SIZEスロットずつまとめて
+    ワーカープロセスで並列実行する。
+    音声データを保持するバッチは、推論中のバッチとV2_DOWNLOAD_LOOKAHEAD_BATCHES個の
+    先読みバッチまでに制限する。
     24時間分の30分単位スロット（48個）を処理対象とし、
     存在しないファイルは無視する。
+    48スロット分のイベントを含む大きなレスポンスになるため、orjsonでシリアライズする。
     
     Args:
         request: ユーザーIDと日付を含むリクエストデータ
@@ -1019,63 +1786,96 @@ async def analyze_sed_timeline_v2(request: TimelineV2Request, threshold: Optiona
     Returns:
         各スロットのタイムライン分析結果
     """
-    print(f"🎯 timeline-v2 処理開始: device_id={request.device_id}, date={request.date}")
+    logger.info("🎯 timeline-v2 処理開始: device_id=%s, date=%s", request.device_id, request.date)
     
     # 日付形式の検証
-    try:
-        datetime.strptime(request.date, '%Y-%m-%d')
-    except ValueError:
+    if not is_valid_date(request.date):
         raise HTTPException(status_code=400, detail="日付はYYYY-MM-DD形式で指定してください")
     
     # 24時間分のスロットを生成
-    all_slots = generate_time_slots()
-    print(f"📋 処理対象スロット数: {len(all_slots)}")
-    
-    processed_slots = []
+    all_slots = TIME_SLOTS
+    logger.info("📋 処理対象スロット数: %s", len(all_slots))
+    
+    # 同時ダウンロード数・同時保存数を制限するセマフォ
+    download_semaphore = asyncio.Semaphore(V2_DOWNLOAD_CONCURRENCY)
+    save_semaphore = asyncio.Semaphore(V2_SAVE_CONCURRENCY)
+    # ダウンロードから推論完了までを実行できるバッチ数（全スロットの音声がメモリに溜まらないようにする）
+    batch_semaphore = asyncio.Semaphore(V2_DOWNLOAD_LOOKAHEAD_BATCHES + 1)
+    
+    async def download_slot(session: aiohttp.ClientSession, slot: str) -> Optional[bytes]:
+        # 音声ファイルをダウンロード
+        async with download_semaphore:
+            logger.info("🕒 処理中のスロット: %s", slot)
+            audio_content = await download_audio_file(session, request.device_id, request.date, slot)
+        
+        if audio_content is None:
+            logger.info("⏭️ スキップ: %s", slot)
+        return audio_content
     
-    # HTTP接続セッションを作成
-    timeout = aiohttp.ClientTimeout(total=30)  # 30秒タイムアウト
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async def save_slots(slot_results: List[Tuple[str, dict]]) -> List[SlotTimelineData]:
+        # 新しいデータ構造に変換
+        slot_events = [
+            (slot, convert_to_new_format(request.device_id, request.date, slot, result["timeline"], result["slot_timeline"]))
+            for slot, result in slot_results
+        ]
         
-        # 各スロットを順次処理
-        for slot in all_slots:
-            print(f"🕒 処理中のスロット: {slot}")
-            
-            # 音声ファイルをダウンロード
-            audio_content = await download_audio_file(session, request.device_id, request.date, slot)
-            
-            if audio_content is None:
-                print(f"⏭️ スキップ: {slot}")
-                continue
-            
-            # 音声データを処理
-            result = process_audio_data(audio_content, threshold)
-            
-            if result is None:
-                print(f"❌ 処理失敗: {slot}")
-                continue
-            
-            # 新しいデータ構造に変換
-            events = convert_to_new_format(request.device_id, request.date, slot, result["timeline"], result["slot_timeline"])
-            
-            # Supabaseに保存
-            supabase_success = await save_to_supabase(request.device_id, request.date, slot, events)
+        # バッチ内のスロットをまとめてSupabaseに保存
+        async with save_semaphore:
+            save_results = await save_batch_to_supabase(request.device_id, request.date, slot_events)
+        
+        slot_data = []
+        for (slot, result), supabase_success in zip(slot_results, save_results):
             if supabase_success:
-                print(f"💾 Supabase保存成功: {slot}")
+                logger.info("💾 Supabase保存成功: %s", slot)
             else:
-                print(f"⚠️ Supabase保存失敗（処理は継続）: {slot}")
+                logger.warning("⚠️ Supabase保存失敗（処理は継続）: %s", slot)
             
-            # 結果を追加
-            slot_data = SlotTimelineData(
+            logger.info("✅ 処理完了: %s (%s件のイベント)", slot, len(result['timeline']))
+            slot_data.append(SlotTimelineData(
                 slot=slot,
                 timeline=result["timeline"],
                 slot_timeline=result["slot_timeline"]
-            )
-            processed_slots.append(slot_data)
-            print(f"✅ 処理完了: {slot} ({len(result['timeline'])}件のイベント)")
+            ))
+        return slot_data
     
-    print(f"🎉 全体処理完了: {len(processed_slots)}/{len(all_slots)} スロット処理済み")
-    print(f"💾 すべてSupabaseに直接保存されました")
+    async def infer_batch(session: aiohttp.ClientSession, batch_slots: List[str]) -> List[Tuple[str, dict]]:
+        contents = await asyncio.gather(*[download_slot(session, slot) for slot in batch_slots])
+        available = [(slot, content) for slot, content in zip(batch_slots, contents) if content is not None]
+        if not available:
+            return []
+        
+        # 音声データをまとめて処理（推論はワーカープロセスで並列実行し、他バッチのI/Oと重ねる）
+        batch_contents = [content for _, content in available]
+        batch_results = await run_batch_inference(batch_contents, threshold)
+        
+        slot_results = []
+        for (slot, _), result in zip(available, batch_results):
+            if result is None:
+                logger.error("❌ 処理失敗: %s", slot)
+                continue
+            slot_results.append((slot, result))
+        return slot_results
+    
+    async def handle_batch(session: aiohttp.ClientSession, batch_slots: List[str]) -> List[Optional[SlotTimelineData]]:
+        # 音声データは推論が終わった時点で手放し、保存は次のバッチのダウンロードと並行して行う
+        async with batch_semaphore:
+            slot_results = await infer_batch(session, batch_slots)
+        if not slot_results:
+            return []
+        return await save_slots(slot_results)
+    
+    # アプリ全体で共有するHTTPセッションを使う
+    session = get_http_session()
+    # V2_BATCH_SIZEスロットごとのバッチを並行処理（結果はスロット順に返る）
+    # バッチはスロット順にbatch_semaphoreを取得するため、先頭のバッチから順に処理される
+    batches = [all_slots[i:i + V2_BATCH_SIZE] for i in range(0, len(all_slots), V2_BATCH_SIZE)]
+    batch_outputs = await asyncio.gather(*[handle_batch(session, batch_slots) for batch_slots in batches])
+    results = [slot_data for output in batch_outputs for slot_data in output]
+    
+    processed_slots = [slot_data for slot_data in results if slot_data is not None]
+    
+    logger.info("🎉 全体処理完了: %s/%s スロット処理済み", len(processed_slots), len(all_slots))
+    logger.info("💾 すべてSupabaseに直接保存されました")
     
     return TimelineV2Result(
         device_id=request.device_id,
@@ -1098,140 +1898,119 @@ async def analyze_sed_summary(file: UploadFile = File(...), threshold: Optional[
     
     Returns:
         約3秒ごとに要約された音響イベントラベルのリスト
+        （各セグメントのラベルは重複なし・出現フレーム数の多い順。eventsには
+        セグメント平均スコアの上位SUMMARY_TOP_K件を確信度付きで含める）
     """
     # ファイル形式の確認
     if not file.filename.endswith('.wav'):
         raise HTTPException(status_code=400, detail="WAVファイル形式のみサポートしています")
     
     try:
-        # ファイルの読み込み
-        content = await file.read()
+        # ファイルの読み込みと前処理（アップロードのスプールファイルから直接デコード）
         try:
-            audio_data, sample_rate = sf.read(io.BytesIO(content))
-            print(f"ファイルを読み込みました: サンプルレート {sample_rate}Hz, 形状 {audio_data.shape}")
-        except Exception as e:
-            print(f"音声ファイルの読み込みに失敗しました: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"音声ファイルの読み込みに失敗しました: {str(e)}")
-        
-        # モノラルに変換
-        if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            audio_data = np.mean(audio_data, axis=1)
-            print(f"ステレオからモノラルに変換しました: 新しい形状 {audio_data.shape}")
-        
-        # YamNetの入力要件に合わせてサンプルレートを変換（必要な場合）
-        if sample_rate != 16000:
-            print(f"サンプルレートが16kHzではありません: {sample_rate}Hz、リサンプリングを行います...")
-            # scipyのsignalモジュールを使用してリサンプリング
-            number_of_samples = round(len(audio_data) * 16000 / sample_rate)
-            audio_data = signal.resample(audio_data, number_of_samples)
-            print(f"リサンプリング完了: {sample_rate}Hz → 16000Hz, 新しい形状 {audio_data.shape}")
-            # サンプルレートを16000に設定
-            sample_rate = 16000
-        
-        # データ型を確認し、必要に応じて変換
-        if audio_data.dtype != np.float32:
-            print(f"データ型を変換: {audio_data.dtype} → float32")
-            audio_data = audio_data.astype(np.float32)
-        
-        # 振幅を適切な範囲に正規化（-1.0 〜 1.0）
-        max_abs = np.max(np.abs(audio_data))
-        if max_abs > 1.0:
-            print(f"オーディオデータを正規化します。最大振幅: {max_abs}")
-            audio_data = audio_data / max_abs
-        
-        # 最大60秒までに制限（1分間だけを処理対象）
-        MAX_AUDIO_LENGTH = 60 * 16000  # 最大60秒まで処理
-        if len(audio_data) > MAX_AUDIO_LENGTH:
-            print(f"オーディオファイルが長すぎるため60秒に切り詰めます: {len(audio_data)/16000:.2f}秒 → 60秒")
-            audio_data = audio_data[:MAX_AUDIO_LENGTH]
+            audio_data = await asyncio.to_thread(_preprocess_wav, file.file, 60)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # モデルを必要時にロード
         try:
-            print("モデルをロードします...")
-            current_model = load_model_if_needed()
-            print("モデルのロードに成功しました")
+            logger.info("モデルをロードします...")
+            await run_in_inference_thread(load_model_if_needed)
+            logger.info("モデルのロードに成功しました")
         except Exception as e:
-            print(f"モデルのロードに失敗しました: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"モデルのロードに失敗しました: {str(e)}")
+            logger.error("モデルのロードに失敗しました: %s", e)
+            raise HTTPException(status_code=503, detail=f"モデルのロードに失敗しました: {str(e)}")
         
         # YamNetでの推論
         try:
-            print("推論を実行します...")
-            scores, embeddings, log_mel_spectrogram = current_model(audio_data)
-            print(f"推論に成功しました: スコアの形状 {scores.shape}")
+            logger.info("推論を実行します...")
+            # 同時に届いた他のリクエストとまとめて推論する（スコアはNumPy配列で返る）
+            scores_np = await infer_scores_microbatched(audio_data)
+            logger.info("推論に成功しました: スコアの形状 %s", scores_np.shape)
         except Exception as e:
-            print(f"推論の実行に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("推論の実行に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"推論の実行に失敗しました: {str(e)}")
         
         # 要約結果の作成
         try:
-            print("要約結果を作成しています...")
+            logger.info("要約結果を作成しています...")
+            
+            # YamNetのフレーム時間はホップ長で決まるモデル定数（0.48秒）
+            n_frames = scores_np.shape[0]
+            audio_duration = len(audio_data) / 16000
+            audio_duration_rounded = round(audio_duration, 2)
+            frame_duration = YAMNET_FRAME_SECONDS
+            
+            logger.info("フレーム時間: %.2f秒、全フレーム数: %s", frame_duration, n_frames)
             
-            # YamNetのフレーム時間（通常約0.48秒）を計算
-            n_frames = scores.shape[0]
-            audio_duration = len(audio_data) / sample_rate
-            frame_duration = audio_duration / n_frames
+            # 何フレームで一つのセグメントとするかを計算（最低1フレーム）
+            frames_per_segment = max(1, round(segment_seconds / frame_duration))
+            logger.info("セグメントあたりのフレーム数: %s（約%s秒）", frames_per_segment, segment_seconds)
             
-            print(f"フレーム時間: {frame_duration:.2f}秒、全フレーム数: {n_frames}")
+            # 各フレームで最も確率の高いラベルを1つだけ選択（全フレーム一括）
+            top_class_idx = np.argmax(scores_np, axis=1)
+            top_prob = scores_np[np.arange(n_frames), top_class_idx]
+            keep = top_prob >= threshold
             
-            # 何フレームで一つのセグメントとするかを計算
-            frames_per_segment = int(segment_seconds / frame_duration)
-            print(f"セグメントあたりのフレーム数: {frames_per_segment}（約{segment_seconds}秒）")
+            # 全セグメントの平均スコアを1回のreduceatで計算し、上位SUMMARY_TOP_K件を部分選択
+            segment_starts = np.arange(0, n_frames, frames_per_segment)
+            segment_ends = np.minimum(segment_starts + frames_per_segment, n_frames)
+            segment_lengths = segment_ends - segment_starts
+            segment_means = np.add.reduceat(scores_np, segment_starts, axis=0) / segment_lengths[:, None]
+            top_k = min(SUMMARY_TOP_K, segment_means.shape[1])
+            segment_top = np.argpartition(-segment_means, top_k - 1, axis=1)[:, :top_k]
+            
+            # セグメントの開始・終了時間（最終フレームは音声の末尾で打ち切る）
+            # フレーム境界はセンチ秒の整数で計算し、小数第2位に丸めた値と一致させる
+            start_times = (segment_starts * YAMNET_FRAME_CENTISECONDS / 100).tolist()
+            end_times = np.minimum(segment_ends * YAMNET_FRAME_CENTISECONDS / 100, audio_duration_rounded).tolist()
             
             # 要約セグメントを格納するリスト
             summary_segments = []
             
-            # 各セグメントごとに処理
-            for segment_idx in range(0, n_frames, frames_per_segment):
-                segment_start_frame = segment_idx
-                segment_end_frame = min(segment_idx + frames_per_segment, n_frames)
-                
-                if segment_end_frame <= segment_start_frame:
-                    break
+            # 閾値を超えたフレームを含むセグメントだけを処理（空のセグメントは追加しない）
+            segment_hits = np.add.reduceat(keep.astype(np.intp), segment_starts)
+            for segment_no in np.flatnonzero(segment_hits).tolist():
+                segment_start_frame = int(segment_starts[segment_no])
+                segment_end_frame = int(segment_ends[segment_no])
                 
-                # セグメントの開始・終了時間
-                start_time = segment_start_frame * frame_duration
-                end_time = segment_end_frame * frame_duration
+                # セグメント内で閾値を超えたフレームのラベルを、出現回数の多い順に重複なく収集
+                # （同数の場合はセグメント内で先に現れたラベルを優先）
+                segment_keep = keep[segment_start_frame:segment_end_frame]
+                segment_classes = top_class_idx[segment_start_frame:segment_end_frame][segment_keep]
+                unique_classes, first_index, counts = np.unique(segment_classes, return_index=True, return_counts=True)
+                order = np.lexsort((first_index, -counts))
+                segment_labels = CLASS_NAMES_ARR[unique_classes[order]].tolist()
                 
-                # セグメント内のすべてのフレームのラベルを収集
-                segment_labels = []
-                
-                for frame_idx in range(segment_start_frame, segment_end_frame):
-                    # 現在のフレームのスコア
-                    frame_scores = scores[frame_idx].numpy()
-                    
-                    # 各フレームで最も確率の高いラベルを1つだけ選択
-                    top_class_idx = np.argmax(frame_scores)
-                    top_prob = float(frame_scores[top_class_idx])
-                    
-                    if top_prob >= threshold:
-                        segment_labels.append(class_names[top_class_idx])
+                # 平均スコアが閾値以上の上位イベントを確信度の降順で付与
+                candidates = segment_top[segment_no]
+                candidate_probs = segment_means[segment_no, candidates]
+                event_order = np.argsort(-candidate_probs, kind='stable')
+                selected = event_order[candidate_probs[event_order] >= threshold]
+                segment_events = [
+                    {"label": label, "prob": round(prob, 2)}
+                    for label, prob in zip(CLASS_NAMES_ARR[candidates[selected]].tolist(), candidate_probs[selected].tolist())
+                ]
                 
                 # セグメントの情報を追加
-                if segment_labels:  # 空のセグメントは追加しない
-                    summary_segments.append({
-                        "start": round(start_time, 2),
-                        "end": round(end_time, 2),
-                        "labels": segment_labels
-                    })
+                summary_segments.append({
+                    "start": start_times[segment_no],
+                    "end": end_times[segment_no],
+                    "labels": segment_labels,
+                    "events": segment_events
+                })
             
-            print(f"要約結果作成完了: {len(summary_segments)}個のセグメント")
+            logger.info("要約結果作成完了: %s個のセグメント", len(summary_segments))
             return {"summary": summary_segments}
         except Exception as e:
-            print(f"要約結果の作成に失敗しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("要約結果の作成に失敗しました: %s", e)
             raise HTTPException(status_code=500, detail=f"要約結果の作成に失敗しました: {str(e)}")
         
     except HTTPException:
         # 既に適切なHTTPExceptionが発生している場合はそのまま再発生
         raise
     except Exception as e:
-        print(f"予期しないエラーが発生しました: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("予期しないエラーが発生しました: %s", e)
         raise HTTPException(status_code=500, detail=f"音声分析中に予期しないエラーが発生しました: {str(e)}")
 
 @app.post("/fetch-and-process")
@@ -1244,6 +2023,9 @@ async def fetch_and_process(request: FetchAndProcessRequest):
     1. Supabaseで処理済みデータを事前チェック
     2. Vault APIで音声データの存在を事前確認
     3. 未処理かつデータ存在のスロットのみ処理
+    4. ダウンロードはV2_DOWNLOAD_CONCURRENCY件まで並行実行し、
+       推論中のバッチよりV2_DOWNLOAD_LOOKAHEAD_BATCHESバッチ先までを先読みする
+    5. 推論はV2_BATCH_SIZEスロットずつまとめて1回で実行
     """
     device_id = request.device_id
     date = request.date
@@ -1252,25 +2034,25 @@ async def fetch_and_process(request: FetchAndProcessRequest):
     # 開始時刻を記録
     start_time = time.time()
     
-    print(f"\n=== 性能改善版 音響イベント検出開始 ===")
-    print(f"デバイスID: {device_id}")
-    print(f"対象日付: {date}")
-    print(f"閾値: {threshold}")
-    print(f"保存先: Supabase behavior_yamnet テーブル")
-    print(f"=" * 50)
+    logger.info("\n=== 性能改善版 音響イベント検出開始 ===")
+    logger.info("デバイスID: %s", device_id)
+    logger.info("対象日付: %s", date)
+    logger.info("閾値: %s", threshold)
+    logger.info("保存先: Supabase behavior_yamnet テーブル")
+    logger.info("=" * 50)
     
     # 24時間分のスロットを生成
     all_slots = generate_time_slots()
-    print(f"📋 総スロット数: {len(all_slots)}")
+    logger.info("📋 総スロット数: %s", len(all_slots))
     
     # Step 1: Supabaseで処理済みデータを確認
-    print(f"\n[Step 1] Supabaseで処理済みデータを確認中...")
+    logger.info("\n[Step 1] Supabaseで処理済みデータを確認中...")
     existing_in_db = await check_existing_data_in_supabase(device_id, date)
     unprocessed_blocks = [slot for slot in all_slots if slot not in existing_in_db]
     skipped_as_processed = len(existing_in_db)
     
-    print(f"✅ 処理済みスロット: {skipped_as_processed}個")
-    print(f"📝 未処理スロット: {len(unprocessed_blocks)}個")
+    logger.info("✅ 処理済みスロット: %s個", skipped_as_processed)
+    logger.info("📝 未処理スロット: %s個", len(unprocessed_blocks))
     
     # 全て処理済みの場合
     if not unprocessed_blocks:
@@ -1298,93 +2080,145 @@ async def fetch_and_process(request: FetchAndProcessRequest):
     saved_to_supabase = []
     skipped_as_no_audio = 0
     
-    # HTTP接続セッションを作成
-    timeout = aiohttp.ClientTimeout(total=30)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        # Step 2: Vault APIで音声データの存在を確認
-        print(f"\n[Step 2] Vault APIで音声データの存在を確認中...")
-        audio_exists = await check_audio_exists_in_vault(session, device_id, date, unprocessed_blocks)
-        blocks_to_process = [slot for slot in unprocessed_blocks if audio_exists.get(slot, False)]
-        skipped_as_no_audio = len(unprocessed_blocks) - len(blocks_to_process)
-        
-        print(f"✅ 音声データ存在: {len(blocks_to_process)}個")
-        print(f"⏭️ 音声データなし: {skipped_as_no_audio}個")
-        
-        # 処理対象がない場合
-        if not blocks_to_process:
-            execution_time = time.time() - start_time
-            return {
-                "status": "success",
-                "device_id": device_id,
-                "date": date,
-                "summary": {
-                    "total_slots": len(all_slots),
-                    "skipped_as_processed_in_db": skipped_as_processed,
-                    "skipped_as_no_audio_in_vault": skipped_as_no_audio,
-                    "successfully_transcribed": 0,
-                    "errors": 0
-                },
-                "processed_blocks": [],
-                "execution_time_seconds": round(execution_time, 1)
-            }
-        
-        # Step 3: 音声ダウンロードと音響イベント検出
-        print(f"\n[Step 3] 音声ダウンロードと音響イベント検出を開始...")
-        print(f"🎯 処理対象: {len(blocks_to_process)}個のスロット")
-        
-        # 実際の処理（未処理かつ音声データ存在のスロットのみ）
-        for slot in blocks_to_process:
+    # アプリ全体で共有するHTTPセッションを使う
+    session = get_http_session()
+    # Step 2: Vault APIで音声データの存在を確認
+    logger.info("\n[Step 2] Vault APIで音声データの存在を確認中...")
+    audio_exists = await check_audio_exists_in_vault(session, device_id, date, unprocessed_blocks)
+    blocks_to_process = [slot for slot in unprocessed_blocks if audio_exists.get(slot, False)]
+    skipped_as_no_audio = len(unprocessed_blocks) - len(blocks_to_process)
+    
+    logger.info("✅ 音声データ存在: %s個", len(blocks_to_process))
+    logger.info("⏭️ 音声データなし: %s個", skipped_as_no_audio)
+    
+    # 処理対象がない場合
+    if not blocks_to_process:
+        execution_time = time.time() - start_time
+        return {
+            "status": "success",
+            "device_id": device_id,
+            "date": date,
+            "summary": {
+                "total_slots": len(all_slots),
+                "skipped_as_processed_in_db": skipped_as_processed,
+                "skipped_as_no_audio_in_vault": skipped_as_no_audio,
+                "successfully_transcribed": 0,
+                "errors": 0
+            },
+            "processed_blocks": [],
+            "execution_time_seconds": round(execution_time, 1)
+        }
+    
+    # Step 3: 音声ダウンロードと音響イベント検出
+    logger.info("\n[Step 3] 音声ダウンロードと音響イベント検出を開始...")
+    logger.info("🎯 処理対象: %s個のスロット", len(blocks_to_process))
+    
+    # 音声ファイルのダウンロードを同時実行数を制限して開始する
+    # （次のバッチのダウンロードは前のバッチの推論・保存と並行して進む）
+    # 一括で開始すると全スロットの音声がメモリに溜まるため、先読みはバッチ単位で制限する
+    download_semaphore = asyncio.Semaphore(V2_DOWNLOAD_CONCURRENCY)
+    
+    async def download_slot(slot: str) -> Optional[bytes]:
+        async with download_semaphore:
+            return await download_audio_file(session, device_id, date, slot)
+    
+    download_tasks = {}
+    
+    def start_batch_downloads(batch_start: int):
+        for slot in blocks_to_process[batch_start:batch_start + V2_BATCH_SIZE]:
+            download_tasks[slot] = asyncio.ensure_future(download_slot(slot))
+    
+    for lookahead in range(V2_DOWNLOAD_LOOKAHEAD_BATCHES):
+        start_batch_downloads(lookahead * V2_BATCH_SIZE)
+    
+    # Supabaseへの保存は次のバッチの推論を待たせないようタスクとして実行し、最後にまとめて集計する
+    save_semaphore = asyncio.Semaphore(V2_SAVE_CONCURRENCY)
+    save_tasks = []
+    
+    async def save_batch(slot_events: List[Tuple[str, List[Dict]]]):
+        async with save_semaphore:
+            return slot_events, await save_batch_to_supabase(device_id, date, slot_events)
+    
+    # 実際の処理（未処理かつ音声データ存在のスロットのみ）
+    # 推論はV2_BATCH_SIZEスロットずつまとめて1回で実行する
+    for i in range(0, len(blocks_to_process), V2_BATCH_SIZE):
+        start_batch_downloads(i + V2_DOWNLOAD_LOOKAHEAD_BATCHES * V2_BATCH_SIZE)
+        batch_slots = blocks_to_process[i:i + V2_BATCH_SIZE]
+        available = []
+        for slot in batch_slots:
             try:
-                print(f"📝 処理開始: {slot}")
+                logger.info("📝 処理開始: %s", slot)
                 
-                # 音声ファイルをダウンロード
-                audio_content = await download_audio_file(session, device_id, date, slot)
+                # 音声ファイルのダウンロード完了を待つ
+                audio_content = await download_tasks.pop(slot)
                 
                 if audio_content is None:
-                    print(f"⏭️ データなし: {slot}")
+                    logger.info("⏭️ データなし: %s", slot)
                     skipped.append(slot)
                     continue
                 
-                print(f"📥 取得: {slot}.wav")
+                logger.info("📥 取得: %s.wav", slot)
                 fetched.append(f"{slot}.wav")
-                
-                # 音声データを処理
-                result = process_audio_data(audio_content, threshold)
-                
+                available.append((slot, audio_content))
+            except Exception as e:
+                logger.error("❌ エラー: %s - %s", slot, e)
+                errors.append(slot)
+        
+        if not available:
+            continue
+        
+        # 音声データをまとめて処理
+        batch_contents = [content for _, content in available]
+        try:
+            batch_results = await run_batch_inference(batch_contents, threshold)
+        except Exception as e:
+            logger.error("❌ バッチ処理エラー: %s - %s", [slot for slot, _ in available], e)
+            errors.extend(slot for slot, _ in available)
+            continue
+        
+        slot_events = []
+        for (slot, _), result in zip(available, batch_results):
+            try:
                 if result is None:
-                    print(f"❌ 処理失敗: {slot}")
+                    logger.error("❌ 処理失敗: %s", slot)
                     errors.append(slot)
                     continue
                 
                 # 新しいデータ構造に変換
                 events = convert_to_new_format(device_id, date, slot, result["timeline"], result["slot_timeline"])
-                
-                # Supabaseに保存
-                supabase_success = await save_to_supabase(device_id, date, slot, events)
-                if supabase_success:
-                    saved_to_supabase.append(slot)
-                    processed.append(slot)
-                    print(f"✅ 完了: {slot} ({len(events)}件のイベント)")
-                else:
-                    errors.append(slot)
+                slot_events.append((slot, events))
                     
             except Exception as e:
-                print(f"❌ エラー: {slot} - {str(e)}")
+                logger.error("❌ エラー: %s - %s", slot, e)
+                errors.append(slot)
+        
+        # バッチ内のスロットをまとめてSupabaseに保存（完了を待たずに次のバッチへ進む）
+        if slot_events:
+            save_tasks.append(asyncio.ensure_future(save_batch(slot_events)))
+    
+    # 保存結果を集計
+    for slot_events, save_results in await asyncio.gather(*save_tasks):
+        for (slot, events), supabase_success in zip(slot_events, save_results):
+            if supabase_success:
+                saved_to_supabase.append(slot)
+                processed.append(slot)
+                logger.info("✅ 完了: %s (%s件のイベント)", slot, len(events))
+            else:
                 errors.append(slot)
     
     # 実行時間を計算
     execution_time = time.time() - start_time
     
-    print(f"\n=== 処理完了（性能改善版） ===")
-    print(f"🕐 実行時間: {round(execution_time, 1)}秒")
-    print(f"📊 処理統計:")
-    print(f"  - 総スロット数: {len(all_slots)}")
-    print(f"  - DB処理済み（スキップ）: {skipped_as_processed}")
-    print(f"  - 音声なし（スキップ）: {skipped_as_no_audio}")
-    print(f"  - 処理成功: {len(processed)}")
-    print(f"  - エラー: {len(errors)}")
-    print(f"💾 Supabase保存: {len(saved_to_supabase)}件")
-    print(f"=" * 50)
+    logger.info("\n=== 処理完了（性能改善版） ===")
+    logger.info("🕐 実行時間: %s秒", round(execution_time, 1))
+    logger.info("📊 処理統計:")
+    logger.info("  - 総スロット数: %s", len(all_slots))
+    logger.info("  - DB処理済み（スキップ）: %s", skipped_as_processed)
+    logger.info("  - 音声なし（スキップ）: %s", skipped_as_no_audio)
+    logger.info("  - 処理成功: %s", len(processed))
+    logger.info("  - エラー: %s", len(errors))
+    logger.info("💾 Supabase保存: %s件", len(saved_to_supabase))
+    logger.info("=" * 50)
     
     return {
         "status": "success",
@@ -1412,10 +2246,10 @@ async def fetch_and_process_paths(request: FetchAndProcessPathsRequest):
     """
     start_time = time.time()
     
-    print(f"\n=== file_pathsベース音響イベント検出開始 ===")
-    print(f"処理対象ファイル数: {len(request.file_paths)}")
-    print(f"閾値: {request.threshold}")
-    print(f"=" * 50)
+    logger.info("\n=== file_pathsベース音響イベント検出開始 ===")
+    logger.info("処理対象ファイル数: %s", len(request.file_paths))
+    logger.info("閾値: %s", request.threshold)
+    logger.info("=" * 50)
     
     # file_pathsパラメータを確認
     if not request.file_paths or len(request.file_paths) == 0:
@@ -1446,76 +2280,107 @@ async def fetch_and_process_paths(request: FetchAndProcessPathsRequest):
                 'time_block': file_info['time_block']
             })
         else:
-            print(f"⚠️ 無効なfile_path形式: {file_path}")
+            logger.warning("⚠️ 無効なfile_path形式: %s", file_path)
     
     # 処理結果を記録
     successfully_processed = []
     error_files = []
     
-    for audio_file in files_to_process:
-        try:
-            file_path = audio_file['file_path']
-            device_id = audio_file['device_id']
-            date = audio_file['date']
-            time_block = audio_file['time_block']
-            
-            print(f"📝 処理開始: {file_path}")
-            
-            # 一時ファイルに音声データをダウンロード
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_file_path = tmp_file.name
+    # S3ダウンロードと推論をパイプライン化する
+    # （ダウンロード済みの一時ファイルをキューに積み、推論中に次のファイルをダウンロードする）
+    # 推論プロセスプールがあればワーカー数分のファイルを並列に推論する
+    download_queue = asyncio.Queue(maxsize=PATHS_PIPELINE_DEPTH)
+    pool = get_inference_pool()
+    n_workers = V2_INFERENCE_PROCESSES if pool is not None else 1
+    
+    async def download_files():
+        for audio_file in files_to_process:
+            tmp_file_path = None
+            try:
+                # 一時ファイルに音声データをダウンロード
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+                    tmp_file_path = tmp_file.name
+                # S3からファイルをダウンロード（file_pathをそのまま使用）
+                await asyncio.to_thread(s3_client.download_file, s3_bucket_name, audio_file['file_path'], tmp_file_path)
+                logger.info("📥 S3ダウンロード成功: %s", audio_file['file_path'])
+                await download_queue.put((audio_file, tmp_file_path, None))
+            except Exception as e:
+                await download_queue.put((audio_file, tmp_file_path, e))
+        for _ in range(n_workers):
+            await download_queue.put(None)
+    
+    async def process_files():
+        while True:
+            item = await download_queue.get()
+            if item is None:
+                break
+            audio_file, tmp_file_path, download_error = item
+            try:
+                file_path = audio_file['file_path']
+                device_id = audio_file['device_id']
+                date = audio_file['date']
+                time_block = audio_file['time_block']
                 
-                try:
-                    # S3からファイルをダウンロード（file_pathをそのまま使用）
-                    s3_client.download_file(s3_bucket_name, file_path, tmp_file_path)
-                    print(f"📥 S3ダウンロード成功: {file_path}")
-                    
-                    # 音声ファイルを読み込み
-                    with open(tmp_file_path, 'rb') as f:
-                        audio_content = f.read()
-                    
-                    # 音声データを処理
-                    result = process_audio_data(audio_content, request.threshold)
-                    
-                    if result is None:
-                        print(f"❌ 音響イベント検出失敗: {file_path}")
-                        error_files.append(audio_file)
-                        continue
-                    
-                    # 新しいデータ構造に変換
-                    events = convert_to_new_format(device_id, date, time_block, result["timeline"], result["slot_timeline"])
-                    
-                    # behavior_yamnetテーブルに保存
-                    supabase_success = await save_to_supabase(device_id, date, time_block, events)
-                    if not supabase_success:
-                        print(f"❌ Supabase保存失敗: {file_path}")
-                        error_files.append(audio_file)
-                        continue
-                    
-                    # audio_filesテーブルのステータスを更新
-                    status_success = await update_audio_files_status(file_path)
-                    if not status_success:
-                        print(f"⚠️ ステータス更新失敗（処理は継続）: {file_path}")
-                    
-                    successfully_processed.append({
-                        'file_path': file_path,
-                        'time_block': time_block
-                    })
-                    print(f"✅ {file_path}: 音響イベント検出完了・Supabase保存済み・ステータス更新済み")
+                logger.info("📝 処理開始: %s", file_path)
                 
-                finally:
-                    # 一時ファイルを削除
-                    if os.path.exists(tmp_file_path):
-                        os.unlink(tmp_file_path)
-        
-        except ClientError as e:
-            error_msg = f"{audio_file['file_path']}: S3エラー - {str(e)}"
-            print(f"❌ {error_msg}")
-            error_files.append(audio_file)
-        
-        except Exception as e:
-            print(f"❌ {audio_file['file_path']}: エラー - {str(e)}")
-            error_files.append(audio_file)
+                # ダウンロード時のエラーはここで扱う
+                if download_error is not None:
+                    raise download_error
+                
+                # 音声データを処理（一時ファイルはバイト列に読み込まず直接デコード）
+                if pool is not None:
+                    result = (await run_batch_inference([tmp_file_path], request.threshold))[0]
+                else:
+                    result = await run_in_inference_thread(process_audio_data, tmp_file_path, request.threshold)
+                
+                if result is None:
+                    logger.error("❌ 音響イベント検出失敗: %s", file_path)
+                    error_files.append(audio_file)
+                    continue
+                
+                # 新しいデータ構造に変換
+                events = convert_to_new_format(device_id, date, time_block, result["timeline"], result["slot_timeline"])
+                
+                # behavior_yamnetテーブルに保存
+                supabase_success = await save_to_supabase(device_id, date, time_block, events)
+                if not supabase_success:
+                    logger.error("❌ Supabase保存失敗: %s", file_path)
+                    error_files.append(audio_file)
+                    continue
+                
+                # audio_filesテーブルのステータスを更新
+                status_success = await update_audio_files_status(file_path)
+                if not status_success:
+                    logger.warning("⚠️ ステータス更新失敗（処理は継続）: %s", file_path)
+                
+                successfully_processed.append({
+                    'file_path': file_path,
+                    'time_block': time_block
+                })
+                logger.info("✅ %s: 音響イベント検出完了・Supabase保存済み・ステータス更新済み", file_path)
+            
+            except ClientError as e:
+                error_msg = f"{audio_file['file_path']}: S3エラー - {str(e)}"
+                logger.error("❌ %s", error_msg)
+                error_files.append(audio_file)
+            
+            except Exception as e:
+                logger.error("❌ %s: エラー - %s", audio_file['file_path'], e)
+                error_files.append(audio_file)
+            
+            finally:
+                # 一時ファイルを削除
+                if tmp_file_path and os.path.exists(tmp_file_path):
+                    os.unlink(tmp_file_path)
+    
+    download_task = asyncio.ensure_future(download_files())
+    await asyncio.gather(*[process_files() for _ in range(n_workers)])
+    await download_task
+    
+    # 並列処理で前後した結果をリクエストのfile_paths順に戻す
+    path_order = {file_path: i for i, file_path in enumerate(request.file_paths)}
+    successfully_processed.sort(key=lambda f: path_order[f['file_path']])
+    error_files.sort(key=lambda f: path_order[f['file_path']])
     
     # 処理結果を返す
     execution_time = time.time() - start_time
@@ -1538,32 +2403,42 @@ async def fetch_and_process_paths(request: FetchAndProcessPathsRequest):
 def read_root():
     return {"message": "Sound Event Detection API is running"}
 
+# /testの確認結果（バージョンとTensorFlowの動作確認は変わらないため初回のみ実行する）
+test_api_cache = None
+
 @app.get("/test")
-def test_api():
+def test_api(deep: bool = False):
     """
     APIの動作テスト用のエンドポイント。
     TensorFlowが正常に動作しているかを確認します。
+    
+    ヘルスチェックで頻繁に呼ばれるため、確認結果は初回にキャッシュする。
+    deep=trueを指定した場合はTensorFlowの演算を再実行する。
     """
+    global test_api_cache
     try:
-        # TensorFlowの基本的な操作をテスト
-        tf_version = tf.__version__
-        test_tensor = tf.constant([[1.0, 2.0], [3.0, 4.0]])
-        test_result = tf.reduce_mean(test_tensor).numpy().tolist()
-        
-        # soundfileの動作テスト
-        sf_version = sf.__version__
-        
-        # NumPyの動作テスト
-        np_version = np.__version__
+        if test_api_cache is None or deep:
+            # TensorFlowの基本的な操作をテスト
+            tf_version = tf.__version__
+            test_tensor = tf.constant([[1.0, 2.0], [3.0, 4.0]])
+            test_result = tf.reduce_mean(test_tensor).numpy().tolist()
+            
+            # soundfileの動作テスト
+            import soundfile as sf
+            sf_version = sf.__version__
+            
+            # NumPyの動作テスト
+            np_version = np.__version__
+            
+            test_api_cache = {
+                "status": "ok",
+                "tensorflow_version": tf_version,
+                "tensorflow_test": test_result,
+                "soundfile_version": sf_version,
+                "numpy_version": np_version
+            }
         
-        return {
-            "status": "ok",
-            "tensorflow_version": tf_version,
-            "tensorflow_test": test_result,
-            "soundfile_version": sf_version,
-            "numpy_version": np_version,
-            "model_loaded": model is not None
-        }
+        return {**test_api_cache, "model_loaded": model is not None}
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1575,7 +2450,7 @@ def test_api():
 @app.post("/debug/clear-cache")
 def clear_cache_endpoint():
     """
-    🔧 TensorFlow Hubキャッシュを手動でクリアするデバッグエンドポイント
+    🔧 TensorFlow Hubキャッシュとローカル保存モデルを手動でクリアするデバッグエンドポイント
     
     用途: 
     - キャッシュ破損問題のトラブルシューティング
@@ -1587,16 +2462,23 @@ def clear_cache_endpoint():
     try:
         print("🔧 手動キャッシュクリアが要求されました")
         clear_tfhub_cache()
+        cleared_local_models = clear_local_model_cache()
         
-        # グローバルモデルもリセット
-        global model
+        # グローバルモデルもリセット（ロード失敗のクールダウンも解除）
+        global model, model_infer, model_load_failed_at
         model = None
+        model_infer = None
+        model_load_failed_at = None
+        # 推論ワーカープロセスも古いモデルを保持しているため、次回リクエスト時に再起動させる
+        if inference_pool is not None:
+            reset_inference_pool(inference_pool)
         print("🔄 モデルインスタンスもリセットしました")
         
         return {
             "status": "success",
-            "message": "TensorFlow Hubキャッシュをクリアしました",
-            "note": "次回のモデルロード時に自動的に再ダウンロードされます",
+            "message": "TensorFlow Hubキャッシュとローカル保存モデル（SavedModel・TFLite）をクリアしました",
+            "cleared_local_models": cleared_local_models,
+            "note": "次回のモデルロード時にTensorFlow Hubから自動的に再ダウンロードされます",
             "model_reset": True
         }
     except Exception as e:
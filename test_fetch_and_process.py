@@ -1,102 +1,156 @@
 #!/usr/bin/env python3
 """
 API SED v1のfetch-and-processエンドポイントのテストスクリプト
+
+複数のデバイス・日付の組み合わせを同時に送信し、サーバーの並行処理性能（全体の所要時間と
+リクエストごとのレイテンシ分布）を計測する。
 """
 
-import requests
+import asyncio
 import json
-from datetime import datetime, timedelta
+import time
+
+import aiohttp
+import numpy as np
 
 # API設定
 API_BASE_URL = "http://localhost:8004"
 ENDPOINT = "/fetch-and-process"
 
-def test_fetch_and_process():
-    """
-    fetch-and-processエンドポイントのテスト
-    """
-    # テスト用のリクエストデータ
-    test_request = {
+# 同時に送信するテスト用のリクエストデータ
+TEST_REQUESTS = [
+    {
         "device_id": "d067d407-cf73-4174-a9c1-d91fb60d64d0",  # 実際のデバイスID
-        "date": "2025-07-05",  # テスト日付
+        "date": date,  # テスト日付
         "threshold": 0.2
     }
-    
+    for date in ("2025-07-05", "2025-07-06", "2025-07-07")
+]
+
+# レイテンシとして報告するパーセンタイル
+LATENCY_PERCENTILES = (50, 90, 99)
+
+async def post_timed(session: aiohttp.ClientSession, test_request: dict):
+    """
+    1件のリクエストを送信し、(ステータスコード, レスポンス本文, 所要秒数) を返す
+
+    例外は呼び出し元でリクエストごとに扱えるよう、そのまま送出する。
+    """
+    start = time.perf_counter()
+    async with session.post(f"{API_BASE_URL}{ENDPOINT}", json=test_request) as response:
+        body = await response.text()
+        return response.status, body, time.perf_counter() - start
+
+def print_result(test_request: dict, status: int, body: str, elapsed: float):
+    """
+    1件分のレスポンスを表示する
+    """
+    print(f"📋 {test_request['device_id']} / {test_request['date']}")
+    print(f"📡 ステータスコード: {status} ({elapsed:.2f}秒)")
+
+    if status == 200:
+        result = json.loads(body)
+        print("✅ リクエスト成功!")
+        summary = result['summary']
+        print(f"📊 処理結果サマリー:")
+        print(f"   - 総スロット数: {summary['total_slots']}")
+        print(f"   - DB処理済み（スキップ）: {summary['skipped_as_processed_in_db']} スロット")
+        print(f"   - 音声なし（スキップ）: {summary['skipped_as_no_audio_in_vault']} スロット")
+        # 処理対象なしで早期リターンした場合はsuccessfully_transcribedキーで返る
+        succeeded = summary.get('successfully_processed', summary.get('successfully_transcribed', 0))
+        print(f"   - 処理成功: {succeeded} スロット")
+        print(f"   - エラー: {summary['errors']} スロット")
+
+        if result.get('processed_blocks'):
+            print(f"💾 処理済みスロット: {result['processed_blocks']}")
+        if result.get('error_blocks'):
+            print(f"⚠️ エラースロット: {result['error_blocks']}")
+    else:
+        print(f"❌ リクエスト失敗: {status}")
+        print(f"エラー詳細: {body}")
+
+async def test_fetch_and_process():
+    """
+    fetch-and-processエンドポイントの並行リクエストテスト
+    """
     print("🧪 fetch-and-processエンドポイントのテスト開始")
-    print(f"📋 リクエストデータ: {json.dumps(test_request, indent=2)}")
+    print(f"📋 リクエストデータ ({len(TEST_REQUESTS)}件を同時送信): {json.dumps(TEST_REQUESTS, indent=2)}")
     print(f"🌐 URL: {API_BASE_URL}{ENDPOINT}")
     print("-" * 50)
-    
-    try:
-        # APIリクエストを送信
-        response = requests.post(
-            f"{API_BASE_URL}{ENDPOINT}",
-            json=test_request,
-            timeout=300  # 5分タイムアウト
+
+    timeout = aiohttp.ClientTimeout(total=300)  # 5分タイムアウト
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[post_timed(session, test_request) for test_request in TEST_REQUESTS],
+            return_exceptions=True
         )
-        
-        print(f"📡 ステータスコード: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ リクエスト成功!")
-            print(f"📊 処理結果サマリー:")
-            print(f"   - 音声取得成功: {result['summary']['audio_fetched']} ファイル")
-            print(f"   - Supabase保存成功: {result['summary']['supabase_saved']} ファイル")
-            print(f"   - スキップ: {result['summary']['skipped_no_data']} ファイル")
-            print(f"   - エラー: {result['summary']['errors']} ファイル")
-            
-            if result.get('saved_to_supabase'):
-                print(f"💾 Supabase保存済みスロット: {result['saved_to_supabase']}")
-            
-            print(f"📄 完全なレスポンス:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-            
+        total_elapsed = time.perf_counter() - start
+
+    latencies = []
+    for test_request, result in zip(TEST_REQUESTS, results):
+        if isinstance(result, asyncio.TimeoutError):
+            print(f"⏰ リクエストタイムアウト (5分): {test_request['date']}")
+        elif isinstance(result, aiohttp.ClientConnectionError):
+            print("🔌 接続エラー - APIサーバーが起動していますか？")
+        elif isinstance(result, Exception):
+            print(f"❌ 予期しないエラー: {str(result)}")
         else:
-            print(f"❌ リクエスト失敗: {response.status_code}")
-            print(f"エラー詳細: {response.text}")
-            
-    except requests.exceptions.Timeout:
-        print("⏰ リクエストタイムアウト (5分)")
-    except requests.exceptions.ConnectionError:
-        print("🔌 接続エラー - APIサーバーが起動していますか？")
-    except Exception as e:
-        print(f"❌ 予期しないエラー: {str(e)}")
+            status, body, elapsed = result
+            latencies.append(elapsed)
+            # 1件の表示失敗でレイテンシの集計まで止めないよう、表示はリクエストごとに保護する
+            try:
+                print_result(test_request, status, body, elapsed)
+            except Exception as e:
+                print(f"❌ レスポンスの表示に失敗しました: {str(e)}")
+                print(f"レスポンス本文: {body}")
+        print("-" * 50)
 
-def test_api_health():
+    print(f"⏱️ 全体の所要時間: {total_elapsed:.2f}秒 ({len(TEST_REQUESTS)}件同時)")
+    if latencies:
+        values = np.percentile(latencies, LATENCY_PERCENTILES)
+        summary = ", ".join(f"p{p}={v:.2f}秒" for p, v in zip(LATENCY_PERCENTILES, values))
+        print(f"📈 リクエストごとのレイテンシ: {summary} (完了 {len(latencies)}件)")
+
+async def test_api_health():
     """
     APIの基本的な動作確認
     """
     print("🔍 API健全性チェック")
-    
+
     try:
         # ルートエンドポイントをテスト
-        response = requests.get(f"{API_BASE_URL}/", timeout=10)
-        if response.status_code == 200:
-            print("✅ APIサーバー正常稼働中")
-            return True
-        else:
-            print(f"⚠️ APIサーバー応答異常: {response.status_code}")
-            return False
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(f"{API_BASE_URL}/") as response:
+                if response.status == 200:
+                    print("✅ APIサーバー正常稼働中")
+                    return True
+                else:
+                    print(f"⚠️ APIサーバー応答異常: {response.status}")
+                    return False
     except Exception as e:
         print(f"❌ APIサーバー接続失敗: {str(e)}")
         return False
 
-if __name__ == "__main__":
-    print("=" * 60)
-    print("🧪 API SED v1.2.0 fetch-and-process テストスクリプト")
-    print("=" * 60)
-    
+async def main():
     # APIの健全性チェック
-    if test_api_health():
+    if await test_api_health():
         print()
         # メインテスト実行
-        test_fetch_and_process()
+        await test_fetch_and_process()
     else:
         print("🚨 APIサーバーが利用できないため、テストを中止します")
         print("💡 サーバーを起動してください: python3 main.py")
-    
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 API SED v1.2.0 fetch-and-process テストスクリプト")
+    print("=" * 60)
+
+    asyncio.run(main())
+
     print()
     print("=" * 60)
     print("🏁 テスト完了")
-    print("=" * 60)
\ No newline at end of file
+    print("=" * 60)